@@ -0,0 +1,313 @@
+######################################################################################
+#    This file is part of the FreeCAD Macro Suite                                    #
+#                                                                                    #
+#    Copyright (C) 2013 Andrew Robinson (andrewjrobinson@gmail.com)                  #
+#                                                                                    #
+#    This library is free software; you can redistribute it and/or                   #
+#    modify it under the terms of the GNU Lesser General Public                      #
+#    License as published by the Free Software Foundation; either                    #
+#    version 2.1 of the License, or (at your option) any later version.              #
+#                                                                                    #
+#    This library is distributed in the hope that it will be useful,                 #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of                  #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU               #
+#    Lesser General Public License for more details.                                 #
+#                                                                                    #
+#    You should have received a copy of the GNU Lesser General Public                #
+#    License along with this library; if not, write to the Free Software             #
+#    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA  #
+######################################################################################
+
+'''
+Times the macros outside of FreeCAD at increasing workload sizes and reports how
+their run time scales.
+
+The macros are run as scripts (like FreeCAD runs them) against the headless
+stand-ins for FreeCAD, FreeCADGui and Part in the headless directory, with a
+synthetic selection from Workloads.py.  Time spent building the workload is not
+included.
+
+e.g.
+python benchmarks/RunBenchmarks.py
+python benchmarks/RunBenchmarks.py --sizes 100,1000,10000 --only LinesToGCode,MergeFaces --json bench.json
+
+The scaling exponent is the slope of log(time) vs log(size) between the two
+largest sizes (1 = linear, 2 = quadratic).  --resident imports each macro once and
+calls its run() (like the workbench commands) instead of running the script.  --phases turns on MacroProfiler and
+shows where the time of each macro's largest run went.  The FeatureCache section
+also checks that changing only the curvature of a feature's input recomputes it
+(and exits with an error if the cache returned the old result).
+'''
+
+import os, sys, math, time, json, argparse, runpy, shutil, tempfile, importlib
+
+benchDir = os.path.dirname(os.path.abspath(__file__))
+srcDir = os.path.join(os.path.dirname(benchDir), 'src')
+sys.path.insert(0, srcDir)
+sys.path.insert(0, os.path.join(benchDir, 'headless'))
+
+import FreeCAD, FreeCADGui, Part
+import Workloads
+
+# name: (macro script relative to src, workload generator, unit)
+macros = [('LinesToGCode', 'cam/LinesToGCode.py', Workloads.edgeChain, 'edges'),
+		('SketchLinesToGCode', 'cam/SketchLinesToGCode.py', Workloads.sketchGeometry, 'edges'),
+		('PocketToGCode', 'cam/PocketToGCode.py', Workloads.pocketOutline, 'vertexes'),
+		('MergeFaces', 'nonparametric/MergeFaces.py', Workloads.triangleSoup, 'faces'),
+		('SimplifyFace', 'nonparametric/SimplifyFace.py', Workloads.denseOutline, 'vertexes'),
+		('MakeSolid', 'nonparametric/MakeSolid.py', Workloads.closedMesh, 'faces'),
+		('flatten3D', 'D2p5/flatten3D.py', Workloads.faceNet, 'faces'),
+		('PromoteSelected', 'nonparametric/PromoteSelected.py', Workloads.faceList, 'faces'),
+		('MakeFace', 'nonparametric/MakeFace.py', Workloads.triangleEdges, 'edges'),
+		]
+
+defaultSizes = [100, 300, 1000, 3000, 10000]
+
+
+def resetState():
+	'''Clears the stand-in state left by the previous run'''
+	FreeCAD.Console.clear()
+	FreeCADGui.Selection.clearSelection()
+	del Part.shown[:]
+
+def timeMacro(path, generator, size, repeat, resident=False):
+	'''Runs the macro repeat times on a fresh workload.  Returns (best seconds, items).'''
+	if resident:
+		module = os.path.relpath(path, srcDir)[:-3].replace(os.sep, '.')
+		run = importlib.import_module(module).run
+	else:
+		run = lambda: runpy.run_path(path, run_name='__main__')
+	best = None
+	items = 0
+	for r in range(repeat):
+		resetState()
+		selection, items = generator(size)
+		FreeCADGui.Selection.setSelectionEx(selection)
+		start = time.time()
+		run()
+		elapsed = time.time() - start
+		if best is None or elapsed < best:
+			best = elapsed
+	return best, items
+
+def timeAirfoils(size, repeat, workDir):
+	'''Times parsing, disk cache and memory cache loads of a size point profile.
+	Returns a dict of {phase: best seconds}.'''
+	from utility import AirfoilLibrary
+	path = Workloads.airfoilFile(size, workDir)
+	cacheDir = os.path.join(workDir, 'cache')
+	results = {}
+	for phase in ('parse', 'diskCache', 'memoryCache'):
+		best = None
+		for r in range(repeat):
+			if phase != 'memoryCache':
+				AirfoilLibrary._loaded.clear()
+			if phase == 'parse' and os.path.isdir(cacheDir):
+				shutil.rmtree(cacheDir)
+			start = time.time()
+			AirfoilLibrary.loadProfile(path, cacheDir)
+			elapsed = time.time() - start
+			if best is None or elapsed < best:
+				best = elapsed
+		results[phase] = best
+	return results
+
+def timeStl(size, repeat, workDir):
+	'''Times reading, welding, merging and making faces from a binary STL file with
+	about size triangles.  Returns a dict of {phase: best seconds} plus the triangle
+	and face counts.'''
+	from nonparametric import MeshMerge
+	path = Workloads.stlFile(size, workDir)
+	results = {}
+	for r in range(repeat):
+		times = {}
+		start = time.time()
+		triangles = MeshMerge.readStl(path)
+		points, faces = MeshMerge.weldTriangles(triangles)
+		times['read'] = time.time() - start
+		start = time.time()
+		polygons, openGroups = MeshMerge.mergeCoplanar(points, faces)
+		times['merge'] = time.time() - start
+		start = time.time()
+		MeshMerge.polygonFaces(points, polygons)
+		times['faces'] = time.time() - start
+		for phase, seconds in times.items():
+			results[phase] = min(seconds, results.get(phase, seconds))
+	results['triangles'] = len(faces)
+	results['polygons'] = len(polygons)
+	return results
+
+def arcFace(size, bulge):
+	'''A face bounded by size arcs through the corners of a regular polygon, each
+	bulging out by bulge (times the side length)'''
+	corners = [FreeCAD.Vector(math.cos(2 * math.pi * i / size), math.sin(2 * math.pi * i / size), 0)
+			for i in range(size)]
+	edges = []
+	for i, a in enumerate(corners):
+		b = corners[(i + 1) % size]
+		middle = (a + b) * 0.5
+		middle = middle + middle.normalize() * ((b - a).Length * bulge)
+		edges.append(Part.ArcOfCircle(a, middle, b).toShape())
+	return Part.Face(Part.Wire(edges))
+
+def checkFeatureCache(size, repeat):
+	'''Times FeatureCache.shapeKey on a face with size arc edges and checks that a
+	feature recomputes when only the curvature of its input changes.  Returns a
+	dict of the best seconds and whether the cache missed.'''
+	from parametric import FeatureCache
+
+	class CountingFeature (FeatureCache.CachedFeature):
+		computed = 0
+
+		def inputKey(self, obj):
+			return FeatureCache.shapeKey(obj.Source)
+
+		def compute(self, obj):
+			self.computed += 1
+			return obj.Source
+	## End CountingFeature Class ##
+
+	class Obj (object):
+		pass
+	## End Obj Class ##
+
+	face = arcFace(size, 0.1)
+	best = None
+	for r in range(repeat):
+		start = time.time()
+		FeatureCache.shapeKey(face)
+		elapsed = time.time() - start
+		best = elapsed if best is None else min(best, elapsed)
+
+	obj = Obj()
+	feature = CountingFeature(obj)
+	for bulge in (0.1, 0.1, 0.3):
+		obj.Source = arcFace(size, bulge)
+		feature.execute(obj)
+	return {'key': best, 'missed': feature.computed == 2}
+
+def lastProfile(path):
+	'''Reads the last MacroProfiler record from the JSON lines log at path'''
+	with open(path) as f:
+		lines = f.read().splitlines()
+	return json.loads(lines[-1]) if lines else None
+
+def reportPhases(record):
+	'''Prints the phase breakdown of a MacroProfiler record'''
+	print("  phases (size %s):" % (record.get('size'),))
+	for name, phase in record['phases'].items():
+		print("    %-16s %10.5fs %8s calls" % (name, phase['seconds'], phase['calls']))
+
+def exponent(points):
+	'''Slope of log(time) vs log(size) between the last 2 (size, time) points'''
+	if len(points) < 2:
+		return None
+	(n1, t1), (n2, t2) = points[-2], points[-1]
+	if t1 <= 0 or t2 <= 0 or n1 == n2:
+		return None
+	return math.log(t2 / t1) / math.log(float(n2) / n1)
+
+def report(name, unit, rows):
+	'''Prints a table of (size, items, seconds) rows'''
+	print("\n%s" % (name,))
+	print("  %10s %10s %12s %14s" % ('size', unit, 'seconds', 'us/' + unit))
+	for size, items, seconds in rows:
+		print("  %10s %10s %12.5f %14.2f" % (size, items, seconds, seconds * 1e6 / max(1, items)))
+	k = exponent([(items, seconds) for size, items, seconds in rows])
+	if k is not None:
+		print("  scaling exponent: %.2f" % (k,))
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Benchmark the FreeCAD Macro Suite macros headlessly")
+	parser.add_argument('--sizes', default=','.join([str(s) for s in defaultSizes]),
+					help="comma separated workload sizes (default: %(default)s)")
+	parser.add_argument('--only', default='', help="comma separated macro names to run")
+	parser.add_argument('--repeat', type=int, default=3, help="runs per size (best is reported)")
+	parser.add_argument('--max-seconds', type=float, default=10.0,
+					help="skip larger sizes once a run takes longer than this")
+	parser.add_argument('--json', default=None, help="also write results to this JSON file")
+	parser.add_argument('--resident', action='store_true',
+					help="import the macros once and call run() (like the workbench)")
+	parser.add_argument('--phases', action='store_true', help="report per-phase times (MacroProfiler)")
+	args = parser.parse_args(argv)
+
+	profileLog = None
+	if args.phases:
+		handle, profileLog = tempfile.mkstemp(suffix='.jsonl')
+		os.close(handle)
+		os.environ['MACROSUITE_PROFILE'] = '1'
+		os.environ['MACROSUITE_PROFILE_LOG'] = profileLog
+
+	sizes = [int(s) for s in args.sizes.split(',') if s]
+	only = set([s for s in args.only.split(',') if s])
+	results = {}
+
+	for name, script, generator, unit in macros:
+		if only and name not in only:
+			continue
+		path = os.path.join(srcDir, script)
+		rows = []
+		for size in sizes:
+			seconds, items = timeMacro(path, generator, size, args.repeat, args.resident)
+			rows.append((size, items, seconds))
+			if seconds > args.max_seconds:
+				break
+		report(name, unit, rows)
+		results[name] = {'unit': unit, 'runs': [{'size': s, 'items': i, 'seconds': t} for s, i, t in rows],
+						'exponent': exponent([(i, t) for s, i, t in rows])}
+		if profileLog:
+			record = lastProfile(profileLog)
+			record['size'] = rows[-1][0]
+			reportPhases(record)
+			results[name]['phases'] = record['phases']
+
+	if not only or 'AirfoilLibrary' in only:
+		workDir = tempfile.mkdtemp()
+		try:
+			rows = []
+			print("\nAirfoilLibrary")
+			print("  %10s %12s %12s %12s" % ('points', 'parse', 'diskCache', 'memoryCache'))
+			for size in sizes:
+				phases = timeAirfoils(size, args.repeat, workDir)
+				print("  %10s %12.5f %12.5f %12.5f" % (size, phases['parse'], phases['diskCache'], phases['memoryCache']))
+				rows.append(dict(size=size, **phases))
+			results['AirfoilLibrary'] = {'unit': 'points', 'runs': rows}
+		finally:
+			shutil.rmtree(workDir)
+
+	if not only or 'ImportStl' in only:
+		workDir = tempfile.mkdtemp()
+		try:
+			rows = []
+			print("\nImportStl")
+			print("  %10s %10s %12s %12s %12s" % ('triangles', 'faces', 'read', 'merge', 'faces'))
+			for size in sizes:
+				phases = timeStl(size, args.repeat, workDir)
+				print("  %10s %10s %12.5f %12.5f %12.5f" % (phases['triangles'], phases['polygons'],
+						phases['read'], phases['merge'], phases['faces']))
+				rows.append(dict(size=size, **phases))
+			results['ImportStl'] = {'unit': 'triangles', 'runs': rows}
+		finally:
+			shutil.rmtree(workDir)
+
+	if not only or 'FeatureCache' in only:
+		rows = []
+		print("\nFeatureCache")
+		print("  %10s %12s %14s" % ('edges', 'shapeKey', 'curvature'))
+		for size in sizes:
+			result = checkFeatureCache(size, args.repeat)
+			print("  %10s %12.5f %14s" % (size, result['key'], 'miss' if result['missed'] else 'STALE HIT'))
+			rows.append(dict(size=size, **result))
+			if not result['missed']:
+				raise SystemExit("FeatureCache: a curvature only change hit the cache")
+		results['FeatureCache'] = {'unit': 'edges', 'runs': rows}
+
+	if profileLog:
+		os.remove(profileLog)
+
+	if args.json:
+		with open(args.json, 'w') as f:
+			json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,245 @@
+######################################################################################
+#    This file is part of the FreeCAD Macro Suite                                    #
+#                                                                                    #
+#    Copyright (C) 2013 Andrew Robinson (andrewjrobinson@gmail.com)                  #
+#                                                                                    #
+#    This library is free software; you can redistribute it and/or                   #
+#    modify it under the terms of the GNU Lesser General Public                      #
+#    License as published by the Free Software Foundation; either                    #
+#    version 2.1 of the License, or (at your option) any later version.              #
+#                                                                                    #
+#    This library is distributed in the hope that it will be useful,                 #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of                  #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU               #
+#    Lesser General Public License for more details.                                 #
+#                                                                                    #
+#    You should have received a copy of the GNU Lesser General Public                #
+#    License along with this library; if not, write to the Free Software             #
+#    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA  #
+######################################################################################
+
+'''
+Synthetic workloads for the benchmarks.  Each generator takes a size (roughly the
+number of edges/faces the macro has to process) and returns a 2-tuple of
+(list of FreeCADGui.SelectionObject's to select before running the macro, number of
+items in the workload).
+
+Generators create independent Vertex objects for every sub-object (like FreeCAD
+does for selected sub-objects) but reuse the same coordinates where they meet.
+
+@see: RunBenchmarks.py
+'''
+
+import math
+import FreeCAD, FreeCADGui, Part
+
+Vector = FreeCAD.Vector
+
+
+def _edge(a, b):
+	'''Makes a line edge between 2 coordinate tuples'''
+	return Part.Edge(Part.Vertex(*a), Part.Vertex(*b))
+
+def _polygonFace(points):
+	'''Makes a face from a closed loop of coordinate tuples (first not repeated)'''
+	edges = [_edge(points[i - 1], points[i]) for i in range(len(points))]
+	return Part.Face(Part.Wire(edges))
+
+def _select(obj, subObjects=None, subElementNames=None):
+	return [FreeCADGui.SelectionObject(obj, subObjects, subElementNames)]
+
+
+def edgeChain(size, arcEvery=10):
+	'''A connected zig-zag chain of size edges (every arcEvery-th is an arc) for the
+	gcode macros'''
+	edges = []
+	x, y = 0.0, 0.0
+	for i in range(size):
+		nx = x + 5.0
+		ny = 3.0 if i % 2 == 0 else 0.0
+		if arcEvery and i % arcEvery == arcEvery - 1:
+			mid = ((x + nx) / 2.0 + 1.0, (y + ny) / 2.0 - 1.0, 0.0)
+			edges.append(Part.ArcOfCircle(Vector(x, y, 0), Vector(*mid), Vector(nx, ny, 0)).toShape())
+		else:
+			edges.append(_edge((x, y, 0.0), (nx, ny, 0.0)))
+		x, y = nx, ny
+	obj = FreeCAD.DocumentObject(Part.Wire(edges), 'Sketch')
+	return _select(obj, edges, ["Edge%s" % (i + 1,) for i in range(size)]), len(edges)
+
+def denseOutline(size):
+	'''A comb shaped face with about size outer vertexes (every tooth gap is a
+	cavity for SimplifyFace)'''
+	teeth = max(1, size // 4)
+	width = teeth * 2.0
+	points = [(0.0, 0.0, 0.0), (width, 0.0, 0.0)]
+	for t in range(teeth - 1, -1, -1):
+		x = t * 2.0
+		points.extend([(x + 2.0, 10.0, 0.0), (x + 1.0, 10.0, 0.0), (x + 1.0, 5.0, 0.0), (x, 5.0, 0.0)])
+	points[-1] = (0.0, 10.0, 0.0)
+	face = _polygonFace(points)
+	obj = FreeCAD.DocumentObject(face, 'Comb')
+	return _select(obj, [face], ['Face1']), len(points)
+
+def triangleSoup(size):
+	'''About size coplanar triangles (a triangulated grid), each its own object, for
+	MergeFaces'''
+	n = max(1, int(math.sqrt(size / 2.0)))
+	selection = []
+	for i in range(n):
+		for j in range(n):
+			a = (float(i), float(j), 0.0)
+			b = (i + 1.0, float(j), 0.0)
+			c = (i + 1.0, j + 1.0, 0.0)
+			d = (float(i), j + 1.0, 0.0)
+			for tri in ((a, b, c), (a, c, d)):
+				obj = FreeCAD.DocumentObject(_polygonFace(tri), 'Triangle')
+				selection.append(FreeCADGui.SelectionObject(obj))
+	return selection, len(selection)
+
+def closedMesh(size):
+	'''A closed, triangulated box with about size triangles (one object) for
+	MakeSolid'''
+	n = max(1, int(math.sqrt(size / 12.0)))
+	faces = []
+	# each side of the cube as a grid in (u, v) mapped to 3D
+	sides = [lambda u, v: (u, v, 0.0), lambda u, v: (v, u, 1.0),
+			lambda u, v: (0.0, u, v), lambda u, v: (1.0, v, u),
+			lambda u, v: (v, 0.0, u), lambda u, v: (u, 1.0, v)]
+	for side in sides:
+		for i in range(n):
+			for j in range(n):
+				u0, u1, v0, v1 = float(i) / n, float(i + 1) / n, float(j) / n, float(j + 1) / n
+				a, b, c, d = side(u0, v0), side(u1, v0), side(u1, v1), side(u0, v1)
+				faces.append(_polygonFace((a, c, b)))
+				faces.append(_polygonFace((a, d, c)))
+	obj = FreeCAD.DocumentObject(Part.Shell(faces), 'Mesh')
+	return _select(obj), len(faces)
+
+def sketchGeometry(size, radius=1.0):
+	'''A sketch (Geometry list) of rounded rectangles, about size lines and arcs in a
+	shuffled order with some lines reversed, plus a construction line per rectangle,
+	for SketchLinesToGCode'''
+	import random
+	rand = random.Random(1)
+	geometry = []
+	r = radius
+	for k in range(max(1, size // 8)):
+		x0, y0 = (k % 10) * 10.0, (k // 10) * 10.0
+		x1, y1 = x0 + 6.0, y0 + 4.0
+		corners = [((x1 - r, y0), (x1 - r, y0 + r), (x1, y0 + r)), ((x1, y1 - r), (x1 - r, y1 - r), (x1 - r, y1)),
+				((x0 + r, y1), (x0 + r, y1 - r), (x0, y1 - r)), ((x0, y0 + r), (x0 + r, y0 + r), (x0 + r, y0))]
+		for i, (start, center, end) in enumerate(corners):
+			angle = math.radians(-45.0 + 90.0 * i)
+			mid = (center[0] + r * math.cos(angle), center[1] + r * math.sin(angle), 0.0)
+			geometry.append(Part.ArcOfCircle(Vector(start[0], start[1], 0), Vector(*mid), Vector(end[0], end[1], 0)))
+			lineEnd = corners[(i + 1) % 4][0]
+			if rand.random() < 0.5:
+				geometry.append(Part.LineSegment(Vector(end[0], end[1], 0), Vector(lineEnd[0], lineEnd[1], 0)))
+			else:
+				geometry.append(Part.LineSegment(Vector(lineEnd[0], lineEnd[1], 0), Vector(end[0], end[1], 0)))
+		diagonal = Part.LineSegment(Vector(x0, y0, 0), Vector(x1, y1, 0))
+		diagonal.Construction = True
+		geometry.append(diagonal)
+	rand.shuffle(geometry)
+	for geo in geometry:
+		if not hasattr(geo, 'Construction'):
+			geo.Construction = False
+	obj = FreeCAD.DocumentObject(None, 'Sketch')
+	obj.Geometry = geometry
+	return _select(obj), len(geometry)
+
+def pocketOutline(size):
+	'''A wavy disc face with about size outer vertexes and a round hole (an island)
+	with a quarter as many, for PocketToGCode'''
+	def loop(count, radius, wave, cx):
+		points = []
+		for i in range(count):
+			t = 2.0 * math.pi * i / count
+			r = radius + wave * math.sin(8 * t)
+			points.append((cx + r * math.cos(t), r * math.sin(t), 0.0))
+		return points
+	outer = loop(max(8, size), 50.0, 5.0, 0.0)
+	hole = loop(max(8, size // 4), 8.0, 0.0, 15.0)[::-1]
+	wires = [Part.Wire([_edge(points[i - 1], points[i]) for i in range(len(points))]) for points in (outer, hole)]
+	face = Part.Face(wires)
+	obj = FreeCAD.DocumentObject(face, 'Pocket')
+	return _select(obj, [face], ['Face1']), len(outer) + len(hole)
+
+def faceNet(size, foldAngle=30.0):
+	'''An accordion of size rectangular faces joined at their Y edges, selected as
+	reference face, bend edge, face, bend edge, face ... for flatten3D'''
+	subObjects = []
+	x, z = 0.0, 0.0
+	lastEdge = None
+	for i in range(size):
+		angle = math.radians(foldAngle if i % 2 else -foldAngle)
+		nx = x + math.cos(angle)
+		nz = z + math.sin(angle)
+		face = _polygonFace(((x, 0.0, z), (nx, 0.0, nz), (nx, 1.0, nz), (x, 1.0, z)))
+		if lastEdge is not None:
+			subObjects.append(lastEdge)
+		subObjects.append(face)
+		lastEdge = _edge((nx, 0.0, nz), (nx, 1.0, nz))
+		x, z = nx, nz
+	obj = FreeCAD.DocumentObject(Part.Shell([s for s in subObjects if s.ShapeType == 'Face']), 'Net')
+	return _select(obj, subObjects), len(subObjects) // 2 + 1
+
+def faceList(size):
+	'''size separate square faces selected on one object for PromoteSelected'''
+	faces = [_polygonFace(((i, 0.0, 0.0), (i + 1.0, 0.0, 0.0), (i + 1.0, 1.0, 0.0), (i, 1.0, 0.0)))
+			for i in range(size)]
+	obj = FreeCAD.DocumentObject(Part.Shell(faces), 'Faces')
+	return _select(obj, faces, ["Face%s" % (i + 1,) for i in range(size)]), len(faces)
+
+def triangleEdges(size):
+	'''size edges that only use 3 distinct vertexes for MakeFace'''
+	corners = ((0.0, 0.0, 0.0), (1.0, 0.0, 0.0), (0.0, 1.0, 0.0))
+	edges = [_edge(corners[i % 3], corners[(i + 1) % 3]) for i in range(size)]
+	obj = FreeCAD.DocumentObject(Part.Wire(edges[:3]), 'Triangle')
+	return _select(obj, edges), len(edges)
+
+def airfoilFile(size, directory):
+	'''Writes a Selig .dat file with size points into directory.  Returns its path.'''
+	import os
+	path = os.path.join(directory, 'bench%s.dat' % (size,))
+	with open(path, 'w') as f:
+		f.write("BENCH %s\n" % (size,))
+		half = size // 2
+		for i in range(size):
+			t = math.pi * i / max(1, size - 1) * 2.0
+			x = 0.5 * (1.0 + math.cos(t))
+			y = 0.06 * math.sin(t) * (1.0 if i <= half else 0.5)
+			f.write(" %.6f  %.6f\n" % (x, y))
+	return path
+
+def stlFile(size, directory, binary=True):
+	'''Writes a closed, triangulated box with about size triangles (like closedMesh)
+	as an STL file into directory.  Returns its path.'''
+	import os, struct
+	n = max(1, int(math.sqrt(size / 12.0)))
+	sides = [lambda u, v: (u, v, 0.0), lambda u, v: (v, u, 1.0),
+			lambda u, v: (0.0, u, v), lambda u, v: (1.0, v, u),
+			lambda u, v: (v, 0.0, u), lambda u, v: (u, 1.0, v)]
+	triangles = []
+	for side in sides:
+		for i in range(n):
+			for j in range(n):
+				u0, u1, v0, v1 = float(i) / n, float(i + 1) / n, float(j) / n, float(j + 1) / n
+				a, b, c, d = side(u0, v0), side(u1, v0), side(u1, v1), side(u0, v1)
+				triangles.extend([(a, c, b), (a, d, c)])
+	path = os.path.join(directory, 'bench%s.stl' % (size,))
+	if binary:
+		with open(path, 'wb') as f:
+			f.write(b'bench'.ljust(80, b' ') + struct.pack('<I', len(triangles)))
+			for tri in triangles:
+				f.write(struct.pack('<12fH', 0.0, 0.0, 0.0, *(tri[0] + tri[1] + tri[2] + (0,))))
+	else:
+		with open(path, 'w') as f:
+			f.write("solid bench\n")
+			for tri in triangles:
+				f.write("facet normal 0 0 0\nouter loop\n")
+				for p in tri:
+					f.write("vertex %.6f %.6f %.6f\n" % p)
+				f.write("endloop\nendfacet\n")
+			f.write("endsolid bench\n")
+	return path
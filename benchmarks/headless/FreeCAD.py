@@ -0,0 +1,163 @@
+######################################################################################
+#    This file is part of the FreeCAD Macro Suite                                    #
+#                                                                                    #
+#    Copyright (C) 2013 Andrew Robinson (andrewjrobinson@gmail.com)                  #
+#                                                                                    #
+#    This library is free software; you can redistribute it and/or                   #
+#    modify it under the terms of the GNU Lesser General Public                      #
+#    License as published by the Free Software Foundation; either                    #
+#    version 2.1 of the License, or (at your option) any later version.              #
+#                                                                                    #
+#    This library is distributed in the hope that it will be useful,                 #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of                  #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU               #
+#    Lesser General Public License for more details.                                 #
+#                                                                                    #
+#    You should have received a copy of the GNU Lesser General Public                #
+#    License along with this library; if not, write to the Free Software             #
+#    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA  #
+######################################################################################
+
+'''
+Headless stand-in for the parts of the FreeCAD module used by the macros.  It lets
+the macros run (and be timed) outside of a FreeCAD GUI session.
+
+Only what the macros need is implemented; it is not a geometry kernel.
+
+@see: RunBenchmarks.py
+'''
+
+import math
+
+# there is no GUI (FreeCAD.GuiUp)
+GuiUp = False
+
+
+class Vector (object):
+	'''A 3D vector (FreeCAD.Vector)'''
+	__slots__ = ('x', 'y', 'z')
+
+	def __init__(self, x=0.0, y=0.0, z=0.0):
+		if isinstance(x, (Vector, tuple, list)):
+			x, y, z = x[0], x[1], x[2]
+		self.x = float(x)
+		self.y = float(y)
+		self.z = float(z)
+
+	def __getitem__(self, i):
+		return (self.x, self.y, self.z)[i]
+
+	def __iter__(self):
+		return iter((self.x, self.y, self.z))
+
+	def __add__(self, o):
+		return Vector(self.x + o.x, self.y + o.y, self.z + o.z)
+
+	def __sub__(self, o):
+		return Vector(self.x - o.x, self.y - o.y, self.z - o.z)
+
+	def __neg__(self):
+		return Vector(-self.x, -self.y, -self.z)
+
+	def __mul__(self, o):
+		if isinstance(o, Vector):
+			return self.dot(o)
+		return Vector(self.x * o, self.y * o, self.z * o)
+	__rmul__ = __mul__
+
+	def __truediv__(self, o):
+		return Vector(self.x / o, self.y / o, self.z / o)
+	__div__ = __truediv__
+
+	def __eq__(self, o):
+		return isinstance(o, Vector) and self.x == o.x and self.y == o.y and self.z == o.z
+
+	def __ne__(self, o):
+		return not self.__eq__(o)
+
+	__hash__ = None
+
+	def __repr__(self):
+		return "Vector (%s, %s, %s)" % (self.x, self.y, self.z)
+
+	@property
+	def Length(self):
+		return math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+
+	def dot(self, o):
+		return self.x * o.x + self.y * o.y + self.z * o.z
+
+	def cross(self, o):
+		return Vector(self.y * o.z - self.z * o.y, self.z * o.x - self.x * o.z, self.x * o.y - self.y * o.x)
+
+	def add(self, o):
+		return self + o
+
+	def sub(self, o):
+		return self - o
+
+	def normalize(self):
+		l = self.Length
+		if l:
+			self.x /= l
+			self.y /= l
+			self.z /= l
+		return self
+
+	def getAngle(self, o):
+		'''Angle (radians) between this and vector o'''
+		l = self.Length * o.Length
+		if not l:
+			return 0.0
+		return math.acos(max(-1.0, min(1.0, self.dot(o) / l)))
+## End Vector Class ##
+
+
+class _Console (object):
+	'''Collects console output (FreeCAD.Console).  Set echo to print it too.'''
+
+	def __init__(self):
+		self.messages = []
+		self.echo = False
+
+	def PrintMessage(self, msg):
+		self.messages.append(msg)
+		if self.echo:
+			print(msg.rstrip('\n'))
+	PrintWarning = PrintMessage
+	PrintError = PrintMessage
+	PrintLog = PrintMessage
+
+	def clear(self):
+		self.messages = []
+
+	def text(self):
+		return ''.join(self.messages)
+## End _Console Class ##
+
+Console = _Console()
+
+
+class ViewObject (object):
+	'''A document object's view provider'''
+
+	def __init__(self):
+		self.Visibility = True
+
+	def hide(self):
+		self.Visibility = False
+
+	def show(self):
+		self.Visibility = True
+## End ViewObject Class ##
+
+
+class DocumentObject (object):
+	'''A document object holding a shape'''
+
+	def __init__(self, shape, name='Shape'):
+		self.Name = name
+		self.Label = name
+		self.Shape = shape
+		self.ViewObject = ViewObject()
+## End DocumentObject Class ##
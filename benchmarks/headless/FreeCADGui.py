@@ -0,0 +1,60 @@
+######################################################################################
+#    This file is part of the FreeCAD Macro Suite                                    #
+#                                                                                    #
+#    Copyright (C) 2013 Andrew Robinson (andrewjrobinson@gmail.com)                  #
+#                                                                                    #
+#    This library is free software; you can redistribute it and/or                   #
+#    modify it under the terms of the GNU Lesser General Public                      #
+#    License as published by the Free Software Foundation; either                    #
+#    version 2.1 of the License, or (at your option) any later version.              #
+#                                                                                    #
+#    This library is distributed in the hope that it will be useful,                 #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of                  #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU               #
+#    Lesser General Public License for more details.                                 #
+#                                                                                    #
+#    You should have received a copy of the GNU Lesser General Public                #
+#    License along with this library; if not, write to the Free Software             #
+#    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA  #
+######################################################################################
+
+'''
+Headless stand-in for FreeCADGui.Selection.  Set the selection with
+Selection.setSelectionEx() before running a macro.
+
+@see: FreeCAD.py
+'''
+
+
+class SelectionObject (object):
+	'''One selected object and its selected sub-objects (in selection order)'''
+
+	def __init__(self, obj, subObjects=None, subElementNames=None):
+		self.Object = obj
+		self.ObjectName = obj.Name
+		self.SubObjects = list(subObjects or [])
+		self.SubElementNames = list(subElementNames or [])
+		self.HasSubObjects = bool(self.SubObjects)
+## End SelectionObject Class ##
+
+
+class _Selection (object):
+	'''The current selection (FreeCADGui.Selection)'''
+
+	def __init__(self):
+		self._selection = []
+
+	def setSelectionEx(self, selection):
+		self._selection = list(selection)
+
+	def clearSelection(self):
+		self._selection = []
+
+	def getSelectionEx(self):
+		return list(self._selection)
+
+	def getSelection(self):
+		return [sel.Object for sel in self._selection]
+## End _Selection Class ##
+
+Selection = _Selection()
@@ -0,0 +1,353 @@
+######################################################################################
+#    This file is part of the FreeCAD Macro Suite                                    #
+#                                                                                    #
+#    Copyright (C) 2013 Andrew Robinson (andrewjrobinson@gmail.com)                  #
+#                                                                                    #
+#    This library is free software; you can redistribute it and/or                   #
+#    modify it under the terms of the GNU Lesser General Public                      #
+#    License as published by the Free Software Foundation; either                    #
+#    version 2.1 of the License, or (at your option) any later version.              #
+#                                                                                    #
+#    This library is distributed in the hope that it will be useful,                 #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of                  #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU               #
+#    Lesser General Public License for more details.                                 #
+#                                                                                    #
+#    You should have received a copy of the GNU Lesser General Public                #
+#    License along with this library; if not, write to the Free Software             #
+#    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA  #
+######################################################################################
+
+'''
+Headless stand-in for the parts of the Part module used by the macros: Vertex, Edge
+(Line and Circle curves), Wire, Face, Shell, Solid, Compound and the make* functions.
+
+Shapes are plain Python objects; there is no tolerance handling or validation.
+Shapes passed to show() are recorded in shown.
+
+@see: FreeCAD.py
+'''
+
+import math
+from FreeCAD import Vector, DocumentObject
+
+# shapes passed to show()
+shown = []
+
+
+def _vector(args):
+	'''Makes a Vector from (Vector,) or (x, y, z) args'''
+	if len(args) == 1:
+		return Vector(args[0])
+	return Vector(*args)
+
+def _uniqueVertexes(edges):
+	'''The vertexes of edges without repeats (by position), in order'''
+	seen = set([])
+	result = []
+	for edge in edges:
+		for v in edge.Vertexes:
+			key = (v.X, v.Y, v.Z)
+			if key not in seen:
+				seen.add(key)
+				result.append(v)
+	return result
+
+
+class Line (object):
+	'''A line (curve) between two points'''
+
+	def __init__(self, start=None, end=None):
+		self.StartPoint = Vector(start) if start is not None else Vector()
+		self.EndPoint = Vector(end) if end is not None else Vector(1, 0, 0)
+
+	def toShape(self):
+		return Edge(self)
+## End Line Class ##
+
+LineSegment = Line
+
+
+class Circle (object):
+	'''A circle (curve)'''
+
+	def __init__(self, center=None, normal=None, radius=1.0):
+		self.Center = Vector(center) if center is not None else Vector()
+		self.Axis = Vector(normal) if normal is not None else Vector(0, 0, 1)
+		self.Radius = float(radius)
+## End Circle Class ##
+
+
+class ArcOfCircle (object):
+	'''An arc through 3 points'''
+
+	def __init__(self, start, middle, end):
+		self.StartPoint = Vector(start)
+		self.EndPoint = Vector(end)
+		a = self.StartPoint
+		b = Vector(middle)
+		c = self.EndPoint
+		ab = b - a
+		ac = c - a
+		normal = ab.cross(ac)
+		d = 2.0 * normal.dot(normal)
+		center = a + (normal.cross(ab) * ac.dot(ac) + ac.cross(normal) * ab.dot(ab)) / d
+		self.Circle = Circle(center, normal.normalize(), (a - center).Length)
+
+	@property
+	def Center(self):
+		return self.Circle.Center
+
+	@property
+	def Radius(self):
+		return self.Circle.Radius
+
+	def toShape(self):
+		edge = Edge(Vertex(self.StartPoint), Vertex(self.EndPoint))
+		edge.Curve = self.Circle
+		return edge
+## End ArcOfCircle Class ##
+
+
+class Shape (object):
+	'''Base of all shapes'''
+	ShapeType = 'Shape'
+
+	@property
+	def Vertexes(self):
+		return _uniqueVertexes(self.Edges)
+
+	@property
+	def Faces(self):
+		return []
+
+	@property
+	def Wires(self):
+		return []
+
+	def getElement(self, name):
+		'''Gets a sub-shape by name e.g. Face2 (numbered from 1)'''
+		for kind in ('Vertex', 'Edge', 'Face'):
+			if name.startswith(kind):
+				return getattr(self, kind + 'es' if kind == 'Vertex' else kind + 's')[int(name[len(kind):]) - 1]
+		raise ValueError("Unknown element %s" % (name,))
+
+	def copy(self):
+		raise NotImplementedError("copy() is not supported by the headless Part module")
+
+	def isSame(self, other):
+		return self is other
+
+	def sewShape(self, tolerance=1e-6):
+		'''Does nothing (headless shapes are never sewn)'''
+		pass
+## End Shape Class ##
+
+
+class Vertex (Shape):
+	'''A point'''
+	ShapeType = 'Vertex'
+	__slots__ = ('X', 'Y', 'Z')
+
+	def __init__(self, *args):
+		v = _vector(args)
+		self.X = v.x
+		self.Y = v.y
+		self.Z = v.z
+
+	@property
+	def Point(self):
+		return Vector(self.X, self.Y, self.Z)
+
+	@property
+	def Vertexes(self):
+		return [self]
+
+	@property
+	def Edges(self):
+		return []
+## End Vertex Class ##
+
+
+class Edge (Shape):
+	'''An edge: Edge(Vertex, Vertex) makes a line, Edge(curve) uses the curve's ends'''
+	ShapeType = 'Edge'
+
+	def __init__(self, *args):
+		if len(args) == 2:
+			self._vertexes = [args[0], args[1]]
+			self.Curve = Line(args[0].Point, args[1].Point)
+		else:
+			curve = args[0]
+			self._vertexes = [Vertex(curve.StartPoint), Vertex(curve.EndPoint)]
+			self.Curve = curve
+
+	@property
+	def Vertexes(self):
+		return self._vertexes
+
+	@property
+	def Edges(self):
+		return [self]
+
+	@property
+	def Length(self):
+		a = self._vertexes[0].Point
+		b = self._vertexes[1].Point
+		if isinstance(self.Curve, Circle):
+			c = self.Curve.Center
+			return self.Curve.Radius * (a - c).getAngle(b - c)
+		return (b - a).Length
+## End Edge Class ##
+
+
+class Wire (Shape):
+	'''A chain of edges'''
+	ShapeType = 'Wire'
+
+	def __init__(self, edges):
+		if isinstance(edges, Shape):
+			edges = edges.Edges
+		self._edges = list(edges)
+
+	@property
+	def Edges(self):
+		return self._edges
+
+	def isClosed(self):
+		first = self._edges[0].Vertexes
+		last = self._edges[-1].Vertexes
+		ends = set([(v.X, v.Y, v.Z) for v in last])
+		return (first[0].X, first[0].Y, first[0].Z) in ends or (first[1].X, first[1].Y, first[1].Z) in ends
+
+	def discretize(self, Deflection=None):
+		'''Points along the wire (only the vertexes; arcs are not split)'''
+		points = [edge.Vertexes[0].Point for edge in self._edges]
+		points.append(self._edges[-1].Vertexes[-1].Point)
+		return points
+## End Wire Class ##
+
+
+class Face (Shape):
+	'''A planar face bounded by wires (the first is the outer wire)'''
+	ShapeType = 'Face'
+
+	def __init__(self, wires):
+		if isinstance(wires, Wire):
+			wires = [wires]
+		self._wires = list(wires)
+
+	@property
+	def Wires(self):
+		return self._wires
+
+	@property
+	def OuterWire(self):
+		return self._wires[0]
+
+	@property
+	def Edges(self):
+		result = []
+		for wire in self._wires:
+			result.extend(wire.Edges)
+		return result
+
+	@property
+	def Faces(self):
+		return [self]
+
+	def copy(self):
+		'''Copies the face (with new vertexes)'''
+		wires = []
+		for wire in self._wires:
+			edges = []
+			for edge in wire.Edges:
+				copied = Edge(Vertex(edge.Vertexes[0].Point), Vertex(edge.Vertexes[1].Point))
+				copied.Curve = edge.Curve
+				edges.append(copied)
+			wires.append(Wire(edges))
+		return Face(wires)
+
+	def normalAt(self, u, v):
+		'''Normal of the outer wire (Newell's method); u and v are ignored'''
+		verts = self.OuterWire.Vertexes
+		n = Vector()
+		for i, a in enumerate(verts):
+			b = verts[(i + 1) % len(verts)]
+			n.x += (a.Y - b.Y) * (a.Z + b.Z)
+			n.y += (a.Z - b.Z) * (a.X + b.X)
+			n.z += (a.X - b.X) * (a.Y + b.Y)
+		return n.normalize()
+
+	def rotate(self, base, axis, angle):
+		'''Rotates the face (in place) by angle degrees around axis through base'''
+		k = Vector(axis).normalize()
+		theta = math.radians(angle)
+		c = math.cos(theta)
+		s = math.sin(theta)
+		done = set([])
+		for edge in self.Edges:
+			for vert in edge.Vertexes:
+				if id(vert) in done:
+					continue
+				done.add(id(vert))
+				p = vert.Point - base
+				r = p * c + k.cross(p) * s + k * (k.dot(p) * (1 - c)) + base
+				vert.X, vert.Y, vert.Z = r.x, r.y, r.z
+## End Face Class ##
+
+
+class Shell (Shape):
+	'''A set of faces'''
+	ShapeType = 'Shell'
+
+	def __init__(self, faces):
+		self._faces = list(faces)
+
+	@property
+	def Faces(self):
+		return self._faces
+
+	@property
+	def Edges(self):
+		result = []
+		for face in self._faces:
+			result.extend(face.Edges)
+		return result
+## End Shell Class ##
+
+
+class Solid (Shell):
+	'''A solid bounded by a shell'''
+	ShapeType = 'Solid'
+
+	def __init__(self, shell):
+		Shell.__init__(self, shell.Faces)
+		self.Shells = [shell]
+## End Solid Class ##
+
+
+class Compound (Shell):
+	'''A collection of shapes (only faces are supported)'''
+	ShapeType = 'Compound'
+## End Compound Class ##
+
+
+def makePolygon(points):
+	'''Makes a wire of straight edges through the points'''
+	verts = [Vertex(p) for p in points]
+	return Wire([Edge(verts[i], verts[i + 1]) for i in range(len(verts) - 1)])
+
+def makeShell(faces):
+	return Shell(faces)
+
+def makeSolid(shell):
+	return Solid(shell)
+
+def makeCompound(shapes):
+	return Compound(shapes)
+
+def show(shape, name='Shape'):
+	'''Records the shape.  Returns a DocumentObject holding it.'''
+	shown.append(shape)
+	return DocumentObject(shape, name)
@@ -33,7 +33,11 @@ the underside of a cube.
 
 
 import FreeCADGui as Gui, FreeCAD, Part, math
-from itertools import izip_longest
+from utility import MacroProfiler
+try:
+	from itertools import izip_longest
+except ImportError: # python 3
+	from itertools import zip_longest as izip_longest
 
 printfc = FreeCAD.Console.PrintMessage
 
@@ -72,28 +76,40 @@ def notNear(v1, v2):
 	'''Checks if two vectors are near each other'''
 	return not (nearValue(v1.x, v2.x) and nearValue(v1.y, v2.y) and nearValue(v1.z, v2.z))
 
-# extract features from selection
-sel = Gui.Selection.getSelectionEx()
-sel.reverse()
-faces = flattenSelection(sel)
-
-# trim off primary face
-primface = faces[0]
-faces = faces[1:]
-
-# calculate each bend
-bends = []
-lastsecoface = primface
-for bendedge,secoface in grouper(2,faces):
-	bends.append(calculateBend(lastsecoface, bendedge, secoface))
-	lastsecoface = secoface
-
-# do bends on last face
-bends.reverse()
-for bend in bends:
-	faces[-1].rotate(bend[0],bend[1], bend[2])
-	printfc("%s\n" % (bend[3]))
-	printfc("%s\n\n" % (faces[-1].normalAt(0,0)))
-	if notNear(bend[3],faces[-1].normalAt(0,0)):
-		faces[-1].rotate(bend[0],bend[1], bend[2]*-2)
-Part.show(faces[-1])
+def run():
+	'''Runs the macro on the current selection'''
+	with MacroProfiler.start('flatten3D') as prof:
+		# extract features from selection
+		with prof.phase('selection'):
+			sel = Gui.Selection.getSelectionEx()
+			sel.reverse()
+			faces = flattenSelection(sel)
+		prof.count('subObjects', len(faces))
+
+		# trim off primary face
+		primface = faces[0]
+		faces = faces[1:]
+
+		# calculate each bend
+		with prof.phase('geometry'):
+			bends = []
+			lastsecoface = primface
+			for bendedge,secoface in grouper(2,faces):
+				bends.append(calculateBend(lastsecoface, bendedge, secoface))
+				lastsecoface = secoface
+		prof.count('bends', len(bends))
+
+		# do bends on last face
+		with prof.phase('occ'):
+			bends.reverse()
+			for bend in bends:
+				faces[-1].rotate(bend[0],bend[1], bend[2])
+				printfc("%s\n" % (bend[3]))
+				printfc("%s\n\n" % (faces[-1].normalAt(0,0)))
+				if notNear(bend[3],faces[-1].normalAt(0,0)):
+					faces[-1].rotate(bend[0],bend[1], bend[2]*-2)
+		with prof.phase('show'):
+			Part.show(faces[-1])
+
+if __name__ == '__main__':
+	run()
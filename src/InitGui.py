@@ -0,0 +1,55 @@
+######################################################################################
+#    This file is part of the FreeCAD Macro Suite                                    #
+#                                                                                    #
+#    Copyright (C) 2013 Andrew Robinson (andrewjrobinson@gmail.com)                  #
+#                                                                                    #
+#    This library is free software; you can redistribute it and/or                   #
+#    modify it under the terms of the GNU Lesser General Public                      #
+#    License as published by the Free Software Foundation; either                    #
+#    version 2.1 of the License, or (at your option) any later version.              #
+#                                                                                    #
+#    This library is distributed in the hope that it will be useful,                 #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of                  #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU               #
+#    Lesser General Public License for more details.                                 #
+#                                                                                    #
+#    You should have received a copy of the GNU Lesser General Public                #
+#    License along with this library; if not, write to the Free Software             #
+#    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA  #
+######################################################################################
+
+'''
+Registers the Macro Suite workbench with FreeCAD.  Copy or symlink the src directory
+into FreeCAD's Mod directory (e.g. ~/.FreeCAD/Mod/MacroSuite) to install it.
+
+Only the command table is loaded when the workbench is activated; the macros
+themselves are imported when first run.  @see: MacroSuiteCommands.py
+'''
+
+import FreeCADGui as Gui
+
+
+class MacroSuiteWorkbench (Gui.Workbench):
+	'''The Macro Suite workbench'''
+	MenuText = "Macro Suite"
+	ToolTip = "A collection of macros for cam, 2.5D and non-parametric modelling"
+
+	def Initialize(self):
+		import MacroSuiteCommands
+		groups = MacroSuiteCommands.register()
+		for group, names in groups.items():
+			self.appendToolbar("Macro Suite " + group, names)
+			self.appendMenu(["Macro Suite", group], names)
+		self.appendMenu("Macro Suite", ['MacroSuite_Reload'])
+
+	def Activated(self):
+		pass
+
+	def Deactivated(self):
+		pass
+
+	def GetClassName(self):
+		return "Gui::PythonWorkbench"
+## End MacroSuiteWorkbench Class ##
+
+Gui.addWorkbench(MacroSuiteWorkbench())
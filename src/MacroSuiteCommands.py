@@ -0,0 +1,124 @@
+######################################################################################
+#    This file is part of the FreeCAD Macro Suite                                    #
+#                                                                                    #
+#    Copyright (C) 2013 Andrew Robinson (andrewjrobinson@gmail.com)                  #
+#                                                                                    #
+#    This library is free software; you can redistribute it and/or                   #
+#    modify it under the terms of the GNU Lesser General Public                      #
+#    License as published by the Free Software Foundation; either                    #
+#    version 2.1 of the License, or (at your option) any later version.              #
+#                                                                                    #
+#    This library is distributed in the hope that it will be useful,                 #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of                  #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU               #
+#    Lesser General Public License for more details.                                 #
+#                                                                                    #
+#    You should have received a copy of the GNU Lesser General Public                #
+#    License along with this library; if not, write to the Free Software             #
+#    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA  #
+######################################################################################
+
+'''
+The FreeCAD commands of the Macro Suite workbench (@see: InitGui.py).
+
+Each macro module is only imported the first time its command is run, so activating
+the workbench doesn't load Part, NumPy etc.  After that the module stays loaded:
+later runs just call its run() function, skipping the script compilation, imports
+and settings set-up of running it as a .FCMacro, and any caches it keeps (e.g.
+parsed airfoils, fitted profiles) carry over between runs.
+
+Because the settings at the top of each macro (and of the helper modules they use,
+e.g. BackgroundTask.py or Pocket.py) are read once, use the Reload Macros command
+after editing them.
+'''
+
+import sys, importlib
+from collections import OrderedDict
+import FreeCAD, FreeCADGui as Gui
+
+try:
+	from importlib import reload
+except ImportError: # python 2 (builtin)
+	pass
+
+# (menu group, macro module, menu text, tool tip)
+macros = [('Cam', 'cam.LinesToGCode', 'Lines to GCode', 'Converts the selected edges (in selection order) to a gcode program'),
+		('Cam', 'cam.PocketToGCode', 'Pocket to GCode', 'Makes a pocket clearing gcode program for the selected face'),
+		('Cam', 'cam.SketchLinesToGCode', 'Sketch lines to GCode', 'Converts the lines, arcs and circles of the selected sketch to gcode'),
+		('2.5D', 'D2p5.flatten3D', 'Flatten 3D', 'Un-folds the selected faces (reference face, bend edge, face, ...) into a plane'),
+		('Non-parametric', 'nonparametric.ImportStl', 'Import STL', 'Imports the STL file set in ImportStl.py as a solid with merged coplanar faces'),
+		('Non-parametric', 'nonparametric.MakeFace', 'Make face', 'Makes a triangle face from the 3 selected vertexes'),
+		('Non-parametric', 'nonparametric.MakeSolid', 'Make solid', 'Makes a solid from the selected faces'),
+		('Non-parametric', 'nonparametric.MergeFaces', 'Merge faces', 'Makes a single face from the selected (planar) faces'),
+		('Non-parametric', 'nonparametric.PromoteSelected', 'Promote selected', 'Makes a new shape from each selected sub-object'),
+		('Non-parametric', 'nonparametric.SimplifyFace', 'Simplify face', 'Removes the cavities from the outside wire of the selected face'),
+		('Parametric', 'parametric.MergeFacesFeature', 'Merge faces (parametric)', 'Makes a feature that merges the selected (planar) faces'),
+		('Parametric', 'parametric.SimplifyFaceFeature', 'Simplify face (parametric)', 'Makes a feature that removes the cavities of the selected face'),
+		('Parametric', 'parametric.Flatten3DFeature', 'Flatten 3D (parametric)', 'Makes a feature that un-folds the selected faces into a plane'),
+		('Utility', 'utility.ImportWing', 'Import wing profile', 'Imports an airfoil profile (.dat file) as a face'),
+		('Utility', 'utility.MakeWing', 'Make wing', 'Makes a lofted wing from the span table in MakeWing.py'),
+		]
+
+# modules the macros import (with settings of their own), in the order they are
+# reloaded: each after the helpers it imports
+helpers = ['utility.MacroProfiler', 'utility.BackgroundTask', 'utility.AirfoilLibrary', 'utility.AirfoilShape',
+		'utility.Wing', 'cam.Pocket', 'nonparametric.MeshMerge', 'parametric.FeatureCache']
+
+
+def commandName(module):
+	'''Gets the FreeCAD command name of a macro module'''
+	return 'MacroSuite_' + module.split('.')[-1]
+
+
+class MacroCommand (object):
+	'''Runs a macro module's run() function (importing it on first use)'''
+
+	def __init__(self, module, menuText, toolTip):
+		self.module = module
+		self.menuText = menuText
+		self.toolTip = toolTip
+
+	def GetResources(self):
+		return {'MenuText': self.menuText, 'ToolTip': self.toolTip}
+
+	def IsActive(self):
+		return FreeCAD.ActiveDocument is not None
+
+	def Activated(self):
+		importlib.import_module(self.module).run()
+## End MacroCommand Class ##
+
+
+class ReloadCommand (object):
+	'''Reloads the loaded helper then macro modules (to pick up edited settings)'''
+
+	def GetResources(self):
+		return {'MenuText': 'Reload macros', 'ToolTip': 'Reloads the macros so edited settings take effect'}
+
+	def IsActive(self):
+		return True
+
+	def Activated(self):
+		for module in helpers + [module for group, module, menuText, toolTip in macros]:
+			if module in sys.modules:
+				reload(sys.modules[module])
+				FreeCAD.Console.PrintMessage("Reloaded %s\n" % (module,))
+## End ReloadCommand Class ##
+
+
+_registered = False
+
+def register():
+	'''Adds the commands to FreeCAD (once).  Returns an OrderedDict of
+	{menu group: [command names]}.'''
+	global _registered
+	groups = OrderedDict()
+	for group, module, menuText, toolTip in macros:
+		name = commandName(module)
+		if not _registered:
+			Gui.addCommand(name, MacroCommand(module, menuText, toolTip))
+		groups.setdefault(group, []).append(name)
+	if not _registered:
+		Gui.addCommand('MacroSuite_Reload', ReloadCommand())
+	_registered = True
+	return groups
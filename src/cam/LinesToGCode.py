@@ -26,10 +26,13 @@ choice).  NOTE: Ctrl-C keyboard shortcut doesn't work from the console.
 
 Note: this macro doesn't yet know how to tell the direction of an arc so it assumes 
 Clockwise.  You will need to change the G02 to G03 of incorrect ones.
+
+The selection is read on the GUI thread and the GCode is made in a worker thread
+(with a progress dialog and cancel button).
 '''
 
 import FreeCADGui as Gui, FreeCAD, Part, math
-from itertools import izip_longest
+from utility import MacroProfiler, BackgroundTask
 
 ## Begin Settings ##
 # basic configuration groups.  Use the useConfig setting below to select which is used.
@@ -77,81 +80,134 @@ def vectorString(vect):
     return "%s|%s|%s" % (vect.x, vect.y, vect.z)
 
 def toStr(line):
-    return "Line [%s -> %s]" % (vertexString(line.Vertexes[0]),vertexString(line.Vertexes[1]))
-
-def feed(edge, currentVert, nextVert):
-    X = round(nextVert.X,3)
-    Y = round(nextVert.Y,3)
+    '''Describes an edge (given as edgeData)'''
+    return "Line [%s|%s|%s -> %s|%s|%s]" % (line[1] + line[2])
+
+def edgeData(edge):
+    '''Gets the plain data needed to make GCode for an edge: a 5-tuple of (kind
+    ('line', 'arc' or None), first vertex, last vertex, arc centre, length) with
+    vertexes as 3-tuples'''
+    v1 = edge.Vertexes[0]
+    v2 = edge.Vertexes[1]
+    kind = None
+    center = None
     if type(edge.Curve) == Part.Line:
-        if slowAtCorners:
-            if edge.Length >= 2.5*slowLen:
-                Xd = (currentVert.X - nextVert.X) / edge.Length * slowLen
-                Yd = (currentVert.Y - nextVert.Y) / edge.Length * slowLen
-                printfc("G01 X%s Y%s F%s\n" % (X + Xd - G54[0], Y + Yd - G54[1], feedRate))
-                printfc("G01 X%s Y%s F%s\n" % (X - G54[0], Y - G54[1], slowRate))
-            else:
-                printfc("G01 X%s Y%s F%s\n" % (X - G54[0], Y - G54[1], slowRate))
-        else:
-            printfc("G01 X%s Y%s F%s\n" % (X - G54[0], Y - G54[1], feedRate))
+        kind = 'line'
     elif type(edge.Curve) == Part.Circle:
-        cen = edge.Curve.Center
-        I = round(cen.x - currentVert.X,3)
-        J = round(cen.y - currentVert.Y,3)
-        printfc("G02 X%s Y%s I%s J%s\n" % (X - G54[0], Y - G54[1], I, J))
-
-# start GCode
-printfc("\n----------\n%\nG54 G21 G90 G40\n\n")
-
-
-sel = Gui.Selection.getSelectionEx()[0]
-
-
-# process from line to line
-lastEdge = None
-lastVerts = []
-doneFirst = False
-for edge in sel.SubObjects:
-    if lastEdge:
-        if vertexString(edge.Vertexes[0]) in lastVerts:
-            currentVert = edge.Vertexes[0]
-            nextVert = edge.Vertexes[1]
-        elif vertexString(edge.Vertexes[1]) in lastVerts:
-            currentVert = edge.Vertexes[1]
-            nextVert = edge.Vertexes[0]
-        else:
-            printfc("Lines don't join\nEdge: %s\nLast edge: %s\n" % (toStr(edge), toStr(lastEdge)))
-            break
-        
-        if not doneFirst:
-            # find other end of first line
-            if vertexString(lastEdge.Vertexes[0]) == vertexString(currentVert):
-                startVert = lastEdge.Vertexes[1]
-            else:
-                startVert = lastEdge.Vertexes[0]
-            
-            # setup
-            X = round(startVert.X,3)
-            Y = round(startVert.Y,3)
-            printfc("(Move to start)\n")
-            printfc("G00 Z%s\n" % (Zrapid,))
-            printfc("G00 X%s Y%s\n" % (X - G54[0], Y - G54[1]))
-            if useZDepth:
-                Z = round(startVert.Z,3)
-                printfc("G01 Z%s F100 (Plunge)\n" % (Z - G54[2],))
+        kind = 'arc'
+        center = (edge.Curve.Center.x, edge.Curve.Center.y)
+    return (kind, (v1.X, v1.Y, v1.Z), (v2.X, v2.Y, v2.Z), center, edge.Length)
+
+def lineMoves(x1, y1, x2, y2, length=None):
+    '''Gets the GCode lines for a straight feed from (x1, y1) to (x2, y2).  length
+    is the length of the line (defaults to its length in XY).'''
+    X = round(x2,3)
+    Y = round(y2,3)
+    if slowAtCorners:
+        if length is None:
+            length = math.hypot(x2 - x1, y2 - y1)
+        if length >= 2.5*slowLen:
+            Xd = (x1 - x2) / length * slowLen
+            Yd = (y1 - y2) / length * slowLen
+            return ["G01 X%s Y%s F%s" % (X + Xd - G54[0], Y + Yd - G54[1], feedRate),
+                    "G01 X%s Y%s F%s" % (X - G54[0], Y - G54[1], slowRate)]
+        return ["G01 X%s Y%s F%s" % (X - G54[0], Y - G54[1], slowRate)]
+    return ["G01 X%s Y%s F%s" % (X - G54[0], Y - G54[1], feedRate)]
+
+def feedMoves(edge, currentVert, nextVert):
+    '''Gets the GCode lines to feed along edge (edgeData) from currentVert to
+    nextVert (3-tuples)'''
+    kind, first, last, center, length = edge
+    X = round(nextVert[0],3)
+    Y = round(nextVert[1],3)
+    if kind == 'line':
+        return lineMoves(currentVert[0], currentVert[1], nextVert[0], nextVert[1], length)
+    elif kind == 'arc':
+        I = round(center[0] - currentVert[0],3)
+        J = round(center[1] - currentVert[1],3)
+        return ["G02 X%s Y%s I%s J%s" % (X - G54[0], Y - G54[1], I, J)]
+    return []
+
+def feed(edge, currentVert, nextVert):
+    for line in feedMoves(edgeData(edge), (currentVert.X, currentVert.Y, currentVert.Z),
+                          (nextVert.X, nextVert.Y, nextVert.Z)):
+        printfc(line + "\n")
+
+def programLines(edges, progress=BackgroundTask.noProgress):
+    '''Makes the GCode lines (between the header and footer) to cut the chain of
+    edges (edgeData, in order)'''
+    lines = []
+    lastEdge = None
+    lastVerts = []
+    doneFirst = False
+    for n, edge in enumerate(edges):
+        if n % 256 == 0:
+            progress(n, len(edges))
+        kind, first, last, center, length = edge
+        if lastEdge:
+            if first in lastVerts:
+                currentVert = first
+                nextVert = last
+            elif last in lastVerts:
+                currentVert = last
+                nextVert = first
             else:
-                printfc("G01 Z%s F100 (Plunge)\n" % (Zcut,))
-                
-            printfc("(Program)\n")
-            
-            # do first line
-            feed(lastEdge, startVert, currentVert)
-            doneFirst = True
-        
-        # do current line
-        feed(edge, currentVert, nextVert)
-        
-    lastVerts = [vertexString(edge.Vertexes[0]), vertexString(edge.Vertexes[1])]
-    lastEdge = edge
-
-printfc("G00 Z1.0 (Retract)\n\nM30 (Program End)\n%\n")
-    
\ No newline at end of file
+                lines.append("Lines don't join\nEdge: %s\nLast edge: %s" % (toStr(edge), toStr(lastEdge)))
+                break
+
+            if not doneFirst:
+                # find other end of first line
+                if lastEdge[1] == currentVert:
+                    startVert = lastEdge[2]
+                else:
+                    startVert = lastEdge[1]
+
+                # setup
+                X = round(startVert[0],3)
+                Y = round(startVert[1],3)
+                lines.append("(Move to start)")
+                lines.append("G00 Z%s" % (Zrapid,))
+                lines.append("G00 X%s Y%s" % (X - G54[0], Y - G54[1]))
+                if useZDepth:
+                    Z = round(startVert[2],3)
+                    lines.append("G01 Z%s F100 (Plunge)" % (Z - G54[2],))
+                else:
+                    lines.append("G01 Z%s F100 (Plunge)" % (Zcut,))
+
+                lines.append("(Program)")
+
+                # do first line
+                lines.extend(feedMoves(lastEdge, startVert, currentVert))
+                doneFirst = True
+
+            # do current line
+            lines.extend(feedMoves(edge, currentVert, nextVert))
+
+        lastVerts = [first, last]
+        lastEdge = edge
+    progress(len(edges), len(edges))
+    return lines
+
+def run():
+    '''Runs the macro on the current selection'''
+    with MacroProfiler.start('LinesToGCode') as prof:
+        with prof.phase('selection'):
+            sel = Gui.Selection.getSelectionEx()[0]
+            edges = [edgeData(edge) for edge in sel.SubObjects]
+        prof.count('edges', len(edges))
+
+        # process from line to line (in a worker thread)
+        with prof.phase('gcode'):
+            try:
+                lines = BackgroundTask.run('Making GCode', programLines, (edges,), len(edges), 'edges')
+            except BackgroundTask.Cancelled:
+                return
+
+        with prof.phase('show'):
+            printfc("\n----------\n%\nG54 G21 G90 G40\n\n")
+            if lines:
+                printfc("\n".join(lines) + "\n")
+            printfc("G00 Z1.0 (Retract)\n\nM30 (Program End)\n%\n")
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,364 @@
+######################################################################################
+#    This file is part of the FreeCAD Macro Suite                                    #
+#                                                                                    #
+#    Copyright (C) 2013 Andrew Robinson (andrewjrobinson@gmail.com)                  #
+#                                                                                    #
+#    This library is free software; you can redistribute it and/or                   #
+#    modify it under the terms of the GNU Lesser General Public                      #
+#    License as published by the Free Software Foundation; either                    #
+#    version 2.1 of the License, or (at your option) any later version.              #
+#                                                                                    #
+#    This library is distributed in the hope that it will be useful,                 #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of                  #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU               #
+#    Lesser General Public License for more details.                                 #
+#                                                                                    #
+#    You should have received a copy of the GNU Lesser General Public                #
+#    License along with this library; if not, write to the Free Software             #
+#    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA  #
+######################################################################################
+
+'''
+Offset based pocket clearing.  Not a macro itself; it is used by PocketToGCode.py.
+
+A region is a list of closed loops ((N, 2) arrays, first point not repeated):
+the outer boundary anticlockwise and any islands clockwise.  Each ring of the
+pocket is an inward offset of the region computed in NumPy:
+.. every edge is moved along its normal and consecutive lines are joined at
+their intersection (mitred; very sharp corners are bevelled),
+.. edges that come out reversed (they collapsed) are dropped and their
+neighbours re-joined, repeatedly,
+.. crossings between the remaining edges (found with a sort-and-sweep on X) split
+the result into simple loops, and a loop is kept only if the winding number is
+positive on its left and not on its right (the parts that turned inside out are
+thrown away; islands grow into the pocket and merge with the outer ring).
+
+e.g.
+rings = pocketRings([outer, island], toolDiameter=3.0, stepover=0.4)
+for link, ring in pocketPath(rings, maxLink=1.8): ...
+'''
+
+import numpy
+
+# miter joins longer than this (times the offset) are bevelled
+miterLimit = 4.0
+
+# lengths/areas below this are treated as zero
+epsilon = 1e-9
+
+# each edge is offset up to this fraction further (a different amount per edge) so
+# edges that were collinear before offsetting never overlap exactly afterwards
+jitter = 1e-7
+
+
+def signedArea(points):
+	'''Gets the signed area of a closed loop (+ve anticlockwise)'''
+	x, y = points[:, 0], points[:, 1]
+	return 0.5 * float(numpy.dot(x, numpy.roll(y, -1)) - numpy.dot(numpy.roll(x, -1), y))
+
+def removeShortEdges(points, tolerance=epsilon):
+	'''Removes points that repeat the one before (including the last onto the first)'''
+	step = numpy.roll(points, -1, axis=0) - points
+	keep = numpy.sqrt((step * step).sum(axis=1)) > tolerance
+	return points[keep]
+
+def _cross(a, b):
+	return a[:, 0] * b[:, 1] - a[:, 1] * b[:, 0]
+
+def _joins(base, dirs):
+	'''Intersects each line with the one before it.  Returns the (N, 2) vertexes.'''
+	prevBase = numpy.roll(base, 1, axis=0)
+	prevDirs = numpy.roll(dirs, 1, axis=0)
+	denom = _cross(prevDirs, dirs)
+	parallel = numpy.abs(denom) < epsilon
+	t = _cross(base - prevBase, dirs) / numpy.where(parallel, 1.0, denom)
+	return numpy.where(parallel[:, None], base, prevBase + prevDirs * t[:, None])
+
+def offsetLoop(points, distance):
+	'''Offsets a closed loop distance to its left (inward for an anticlockwise
+	loop, outward for a clockwise one).  Collapsed edges are removed but the
+	result may still cross itself (@see: splitLoops).  Returns an (M, 2) array
+	(empty if the whole loop collapsed).'''
+	points = removeShortEdges(numpy.asarray(points, dtype=float))
+	if len(points) < 3:
+		return numpy.zeros((0, 2))
+	step = numpy.roll(points, -1, axis=0) - points
+	dirs = step / numpy.sqrt((step * step).sum(axis=1))[:, None]
+	distances = distance * (1.0 + jitter * ((numpy.arange(len(points)) * 0.6180339887) % 1.0))
+	normals = numpy.column_stack((-dirs[:, 1], dirs[:, 0])) * distances[:, None]
+	base = points + normals
+	ends = points + step + normals
+
+	# drop the edges that come out reversed until none do
+	while True:
+		verts = _joins(base, dirs)
+		along = ((numpy.roll(verts, -1, axis=0) - verts) * dirs).sum(axis=1)
+		collapsed = along <= epsilon
+		if not collapsed.any():
+			break
+		if len(base) - collapsed.sum() < 3:
+			return numpy.zeros((0, 2))
+		base, dirs, ends = base[~collapsed], dirs[~collapsed], ends[~collapsed]
+
+	# bevel the long miters that overshoot both edges (replace the vertex with the
+	# end of the edge before and the start of the edge after)
+	prevEnds = numpy.roll(ends, 1, axis=0)
+	prevDirs = numpy.roll(dirs, 1, axis=0)
+	miter = verts - 0.5 * (prevEnds + base)
+	bevel = (numpy.sqrt((miter * miter).sum(axis=1)) > miterLimit * abs(distance)) \
+			& (((verts - prevEnds) * prevDirs).sum(axis=1) > 0) & (((base - verts) * dirs).sum(axis=1) > 0)
+	if bevel.any():
+		counts = numpy.where(bevel, 2, 1)
+		slots = numpy.cumsum(counts) - counts
+		verts = numpy.repeat(verts, counts, axis=0)
+		verts[slots[bevel]] = prevEnds[bevel]
+		verts[slots[bevel] + 1] = base[bevel]
+	return removeShortEdges(verts)
+
+def segmentCrossings(starts, ends):
+	'''Finds the proper crossings between segments (sort and sweep on X).  Returns
+	(i, j, t, u): segment i crosses segment j at starts[i] + t * (ends[i] - starts[i])
+	(= starts[j] + u * (ends[j] - starts[j])).'''
+	count = len(starts)
+	low = numpy.minimum(starts[:, 0], ends[:, 0])
+	high = numpy.maximum(starts[:, 0], ends[:, 0])
+	order = numpy.argsort(low, kind='mergesort')
+	sortedLow = low[order]
+
+	# candidates: segments later in X order that start before this one ends
+	last = numpy.searchsorted(sortedLow, high[order], 'right')
+	counts = numpy.maximum(last - numpy.arange(1, count + 1), 0)
+	total = int(counts.sum())
+	if not total:
+		empty = numpy.zeros(0)
+		return empty.astype(int), empty.astype(int), empty, empty
+	firsts = numpy.cumsum(counts) - counts
+	position = numpy.arange(total) - numpy.repeat(firsts, counts) + numpy.repeat(numpy.arange(1, count + 1), counts)
+	i = numpy.repeat(order, counts)
+	j = order[position]
+
+	# overlapping in Y too
+	lowY = numpy.minimum(starts[:, 1], ends[:, 1])
+	highY = numpy.maximum(starts[:, 1], ends[:, 1])
+	overlap = (lowY[i] <= highY[j]) & (lowY[j] <= highY[i])
+	i, j = i[overlap], j[overlap]
+
+	r = ends[i] - starts[i]
+	s = ends[j] - starts[j]
+	denom = _cross(r, s)
+	nonParallel = numpy.abs(denom) > epsilon
+	denom = numpy.where(nonParallel, denom, 1.0)
+	gap = starts[j] - starts[i]
+	t = _cross(gap, s) / denom
+	u = _cross(gap, r) / denom
+	crossing = nonParallel & (t > epsilon) & (t < 1 - epsilon) & (u > epsilon) & (u < 1 - epsilon)
+	return i[crossing], j[crossing], t[crossing], u[crossing]
+
+def _segments(loops):
+	'''Concatenates loops into segments.  Returns (starts, ends, loop of each segment).'''
+	starts = numpy.concatenate(loops)
+	ends = numpy.concatenate([numpy.roll(loop, -1, axis=0) for loop in loops])
+	loopIds = numpy.repeat(numpy.arange(len(loops)), [len(loop) for loop in loops])
+	return starts, ends, loopIds
+
+def splitLoops(loops):
+	'''Splits loops (which may cross themselves and each other) into simple loops
+	by switching to the other loop at every crossing.'''
+	loops = [loop for loop in loops if len(loop) >= 3]
+	if not loops:
+		return []
+	starts, ends, loopIds = _segments(loops)
+	i, j, t, u = segmentCrossings(starts, ends)
+	if not len(i):
+		return loops
+
+	# nodes: each segment's start then its crossings in order along it
+	count = len(starts)
+	crossings = len(i)
+	segment = numpy.concatenate((numpy.arange(count), i, j))
+	param = numpy.concatenate((numpy.zeros(count) - 1.0, t, u))
+	points = numpy.concatenate((starts, starts[i] + (ends[i] - starts[i]) * t[:, None],
+								starts[i] + (ends[i] - starts[i]) * t[:, None]))
+	order = numpy.lexsort((param, segment))
+	rank = numpy.empty(len(order), dtype=int)
+	rank[order] = numpy.arange(len(order))
+
+	# next node around the same loop (the last node of a loop wraps to its first)
+	nodeLoop = loopIds[segment[order]]
+	following = numpy.arange(1, len(order) + 1)
+	lastOfLoop = numpy.append(nodeLoop[1:] != nodeLoop[:-1], True)
+	firstOfLoop = numpy.concatenate(([0], numpy.nonzero(lastOfLoop)[0][:-1] + 1))
+	following[lastOfLoop] = firstOfLoop
+	twin = numpy.full(len(order), -1)
+	twin[rank[count:count + crossings]] = rank[count + crossings:]
+	twin[rank[count + crossings:]] = rank[count:count + crossings]
+
+	following = following.tolist()
+	twin = twin.tolist()
+	nodePoints = points[order]
+	visited = [False] * len(order)
+	result = []
+	for start in range(len(order)):
+		if visited[start]:
+			continue
+		loop = []
+		node = start
+		while not visited[node]:
+			visited[node] = True
+			loop.append(node)
+			node = following[twin[node]] if twin[node] >= 0 else following[node]
+		if node == start and len(loop) >= 3:
+			result.append(removeShortEdges(nodePoints[loop]))
+	return [loop for loop in result if len(loop) >= 3]
+
+def windingNumbers(points, loops, blockSize=1 << 20):
+	'''Gets the winding number of each (N, 2) point with respect to the loops'''
+	starts, ends, loopIds = _segments(loops)
+	result = numpy.zeros(len(points), dtype=int)
+	rows = max(1, blockSize // max(1, len(starts)))
+	for first in range(0, len(points), rows):
+		p = points[first:first + rows]
+		px, py = p[:, 0:1], p[:, 1:2]
+		ax, ay, bx, by = starts[:, 0], starts[:, 1], ends[:, 0], ends[:, 1]
+		side = (bx - ax) * (py - ay) - (px - ax) * (by - ay)
+		up = (ay <= py) & (by > py) & (side > 0)
+		down = (ay > py) & (by <= py) & (side < 0)
+		result[first:first + rows] = up.sum(axis=1) - down.sum(axis=1)
+	return result
+
+def offsetRegion(loops, distance):
+	'''Offsets a region (anticlockwise outer loop(s), clockwise islands) inward by
+	distance.  Returns the list of loops bounding the result (same orientation rules).'''
+	raw = [offsetLoop(loop, distance) for loop in loops]
+	raw = [loop for loop in raw if len(loop) >= 3]
+	if not raw:
+		return []
+	pieces = splitLoops(raw)
+
+	# probe each piece just left and right of the middle of its longest edge
+	probes = []
+	for loop in pieces:
+		step = numpy.roll(loop, -1, axis=0) - loop
+		lengths = numpy.sqrt((step * step).sum(axis=1))
+		k = int(numpy.argmax(lengths))
+		middle = loop[k] + 0.5 * step[k]
+		normal = numpy.array((-step[k, 1], step[k, 0])) / lengths[k]
+		nudge = min(abs(distance), lengths[k]) * 1e-3
+		probes.extend([middle + normal * nudge, middle - normal * nudge])
+	winding = windingNumbers(numpy.array(probes), raw).reshape(-1, 2)
+	return [loop for loop, (left, right) in zip(pieces, winding.tolist())
+			if left > 0 and right <= 0 and abs(signedArea(loop)) > jitter * distance * distance]
+
+def pocketRings(loops, toolDiameter, stepover=0.4, maxRings=10000):
+	'''Gets the tool centre rings to clear a region: the first at the tool radius
+	from the boundary then every stepover (fraction of the tool diameter) further
+	in.  Each ring is offset from the one before (offsetting twice is the same as
+	offsetting once by the sum), so few edges collapse at each step.  Returns a
+	list of (ring number, loop) tuples (outermost first).'''
+	step = stepover * toolDiameter
+	if step <= 0:
+		raise ValueError("The stepover must be more than 0")
+	rings = []
+	region = offsetRegion(loops, 0.5 * toolDiameter)
+	for k in range(maxRings):
+		if not region:
+			break
+		rings.extend([(k, loop) for loop in region])
+		region = offsetRegion(region, step)
+	return rings
+
+def _smallestContaining(points, loops):
+	'''Gets the index of the smallest loop that contains each (N, 2) point (-1 if
+	none do)'''
+	owner = numpy.full(len(points), -1, dtype=int)
+	if not len(points):
+		return owner
+	for i in sorted(range(len(loops)), key=lambda i: -abs(signedArea(loops[i]))):
+		owner[windingNumbers(points, [loops[i]]) != 0] = i
+	return owner
+
+def ringTree(rings):
+	'''Groups the rings of each depth into regions (an outer loop and the islands
+	inside it) and links each region to the region of the ring before that
+	contains it.  Returns a 2-tuple of (list of lists of loops, parent region of
+	each (-1 for the outermost)).'''
+	byDepth = {}
+	for k, loop in rings:
+		byDepth.setdefault(k, []).append(loop)
+	regions = []
+	parents = []
+	previous, previousOuters = [], []
+	for k in sorted(byDepth):
+		outers = [loop for loop in byDepth[k] if signedArea(loop) > 0]
+		holes = [loop for loop in byDepth[k] if signedArea(loop) <= 0]
+		first = len(regions)
+		regions.extend([[outer] for outer in outers])
+		owners = _smallestContaining(numpy.array([hole[0] for hole in holes]).reshape(-1, 2), outers)
+		for hole, owner in zip(holes, owners.tolist()):
+			if owner >= 0:
+				regions[first + owner].append(hole)
+			else:
+				regions.append([hole])
+		current = range(first, len(regions))
+		starts = numpy.array([regions[r][0][0] for r in current]).reshape(-1, 2)
+		owners = _smallestContaining(starts, previousOuters)
+		parents.extend([previous[owner] if owner >= 0 else -1 for owner in owners.tolist()])
+		previous = list(current)
+		previousOuters = [regions[r][0] for r in current]
+	return regions, parents
+
+def _nearest(loops, position):
+	'''Finds the loop vertex nearest to position.  Returns a 3-tuple of (loop
+	index, vertex index, squared distance).'''
+	best, bestVertex, bestDistance = None, 0, None
+	for n, loop in enumerate(loops):
+		offsets = loop - position
+		distances = (offsets * offsets).sum(axis=1)
+		vertex = int(numpy.argmin(distances))
+		if bestDistance is None or distances[vertex] < bestDistance:
+			best, bestVertex, bestDistance = n, vertex, distances[vertex]
+	return best, bestVertex, bestDistance
+
+def pocketPath(rings, maxLink, position=(0.0, 0.0)):
+	'''Orders the rings to be cut from the inside out one branch at a time: a
+	region (@see: ringTree) is cut once every region inside it has been, and the
+	region around the one just cut follows it as soon as it is ready, so separate
+	lobes of the pocket are each finished before moving to the next (the nearest
+	ready region).  Each ring starts at the vertex nearest to where the last one
+	finished.  Returns a list of (link, ring) tuples where link is 'feed' if the
+	move from the last ring is at most maxLink long (cut directly), else 'retract'.
+	Each ring is closed (its first point is repeated at the end).'''
+	regions, parents = ringTree(rings)
+	pending = [0] * len(regions)
+	for parent in parents:
+		if parent >= 0:
+			pending[parent] += 1
+	ready = [r for r in range(len(regions)) if not pending[r]]
+	position = numpy.asarray(position, dtype=float)
+	path = []
+	following = None
+	while ready:
+		if following is not None:
+			region = following
+		else:
+			candidates = [(r, loop) for r in ready for loop in regions[r]]
+			region = candidates[_nearest([loop for r, loop in candidates], position)[0]][0]
+		ready.remove(region)
+
+		remaining = list(regions[region])
+		while remaining:
+			best, bestVertex, bestDistance = _nearest(remaining, position)
+			loop = remaining.pop(best)
+			ring = numpy.concatenate((loop[bestVertex:], loop[:bestVertex + 1]))
+			link = 'feed' if path and numpy.sqrt(bestDistance) <= maxLink else 'retract'
+			path.append((link, ring))
+			position = ring[-1]
+
+		following = None
+		parent = parents[region]
+		if parent >= 0:
+			pending[parent] -= 1
+			if not pending[parent]:
+				ready.append(parent)
+				following = parent
+	return path
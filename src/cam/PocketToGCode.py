@@ -0,0 +1,163 @@
+######################################################################################
+#    This file is part of the FreeCAD Macro Suite                                    #
+#                                                                                    #
+#    Copyright (C) 2013 Andrew Robinson (andrewjrobinson@gmail.com)                  #
+#                                                                                    #
+#    This library is free software; you can redistribute it and/or                   #
+#    modify it under the terms of the GNU Lesser General Public                      #
+#    License as published by the Free Software Foundation; either                    #
+#    version 2.1 of the License, or (at your option) any later version.              #
+#                                                                                    #
+#    This library is distributed in the hope that it will be useful,                 #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of                  #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU               #
+#    Lesser General Public License for more details.                                 #
+#                                                                                    #
+#    You should have received a copy of the GNU Lesser General Public                #
+#    License along with this library; if not, write to the Free Software             #
+#    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA  #
+######################################################################################
+
+'''
+A macro to make a pocket clearing GCode program for the selected face (or a closed
+loop of selected edges).
+
+The tool follows rings offset inward from the boundary (and outward from any holes
+in the face, which are left as islands), one stepover apart, starting from the
+middle.  Moves between rings are cut directly when they are short, otherwise the
+tool retracts to Zrapid.  Feed rates, Zrapid/Zcut and the G54 offset come from
+the settings in LinesToGCode.py; with slowAtCorners the feed only slows before real
+corners of a ring (turns of more than cornerAngle), not at every short segment of
+a curve.
+
+The output is printed to the FreeCAD console (which you can copy to a file of your 
+choice).
+
+@see: Pocket.py, for the offsetting
+'''
+
+import FreeCADGui as Gui, FreeCAD, Part, math
+import numpy
+from cam import Pocket, LinesToGCode
+from utility import MacroProfiler
+
+printfc = FreeCAD.Console.PrintMessage
+
+## Begin Settings ##
+toolDiameter = 3.0
+stepover = 0.4          # distance between rings (fraction of toolDiameter)
+maxLink = 1.5           # longest move between rings (times the stepover) that is cut without retracting
+deflection = 0.01       # maximum distance between a curved edge and its straight segments
+cornerAngle = 30.0      # smallest turn (degrees) between ring segments that is slowed for as a corner
+## end settings ##
+
+def wireLoop(wire):
+    '''Gets the XY points of a closed wire as an (N, 2) array (curved edges are
+    split into straight segments)'''
+    points = numpy.array([(v.x, v.y) for v in wire.discretize(Deflection=deflection)], dtype=float)
+    if len(points) > 1 and numpy.allclose(points[0], points[-1]):
+        points = points[:-1]
+    return points
+
+def selectedFace(selection):
+    '''Gets the face to pocket: the first selected face, or a face made from the
+    selected edges'''
+    edges = []
+    for sel in selection:
+        for sub in (sel.SubObjects or sel.Object.Shape.Faces[:1]):
+            if sub.ShapeType == 'Face':
+                return sub
+            if sub.ShapeType == 'Edge':
+                edges.append(sub)
+    if not edges:
+        raise ValueError("Select a face or a closed loop of edges")
+    return Part.Face(Part.Wire(Part.__sortEdges__(edges)))
+
+def faceRegion(face):
+    '''Gets the loops of a face: the outer wire anticlockwise then the holes
+    clockwise'''
+    outer = face.OuterWire
+    loops = [wireLoop(outer)]
+    loops.extend([wireLoop(wire) for wire in face.Wires if not wire.isSame(outer)])
+    for i, loop in enumerate(loops):
+        if (Pocket.signedArea(loop) > 0) != (i == 0):
+            loops[i] = loop[::-1]
+    return loops
+
+def ringMoves(ring):
+    '''Gets the GCode lines to feed around a ring ((N, 2) array, first point
+    repeated at the end).  The run between two corners (turns of more than
+    cornerAngle, and the end of the ring) is slowed like a single line by
+    LinesToGCode.lineMoves: the last slowLen before the corner, or all of it when
+    the run is shorter than 2.5 slowLen.'''
+    G54 = LinesToGCode.G54
+    ring = numpy.asarray(ring, dtype=float)
+    steps = ring[1:] - ring[:-1]
+    lengths = numpy.maximum(numpy.hypot(steps[:, 0], steps[:, 1]), Pocket.epsilon)
+
+    # distance along each segment at which the slow feed starts
+    if LinesToGCode.slowAtCorners:
+        slowLen = LinesToGCode.slowLen
+        turn = numpy.arctan2(steps[:-1, 0] * steps[1:, 1] - steps[:-1, 1] * steps[1:, 0],
+                             (steps[:-1] * steps[1:]).sum(axis=1))
+        corners = numpy.nonzero(numpy.append(numpy.abs(turn) > math.radians(cornerAngle), True))[0]
+        travelled = numpy.cumsum(lengths)
+        following = numpy.searchsorted(corners, numpy.arange(len(steps)))
+        runEnd = travelled[corners[following]]
+        runStart = numpy.where(following > 0, travelled[corners[numpy.maximum(following - 1, 0)]], 0.0)
+        slowFrom = numpy.clip(lengths - (slowLen - (runEnd - travelled)), 0.0, lengths)
+        slowFrom[runEnd - runStart < 2.5 * slowLen] = 0.0
+    else:
+        slowFrom = lengths
+
+    lines = []
+    for (x1, y1), (x2, y2), length, start in zip(ring[:-1].tolist(), ring[1:].tolist(), lengths.tolist(), slowFrom.tolist()):
+        if start > Pocket.epsilon:
+            x, y = (x1 + (x2 - x1) * start / length, y1 + (y2 - y1) * start / length) if start < length else (x2, y2)
+            lines.append("G01 X%s Y%s F%s" % (round(x,3) - G54[0], round(y,3) - G54[1], LinesToGCode.feedRate))
+        if start < length - Pocket.epsilon:
+            lines.append("G01 X%s Y%s F%s" % (round(x2,3) - G54[0], round(y2,3) - G54[1], LinesToGCode.slowRate))
+    return lines
+
+def pocketGCode(path, Z):
+    '''Makes the GCode lines to cut the (link, ring) path at depth Z'''
+    G54 = LinesToGCode.G54
+    lines = ["", "----------", "%", "G54 G21 G90 G40", ""]
+    last = None
+    for link, ring in path:
+        x, y = ring[0]
+        if link == 'retract':
+            lines.append("G00 Z%s" % (LinesToGCode.Zrapid,))
+            lines.append("G00 X%s Y%s" % (round(x,3) - G54[0], round(y,3) - G54[1]))
+            lines.append("G01 Z%s F100 (Plunge)" % (Z,))
+        else:
+            lines.extend(LinesToGCode.lineMoves(last[0], last[1], x, y))
+        lines.extend(ringMoves(ring))
+        last = ring[-1].tolist()
+    lines.extend(["G00 Z%s (Retract)" % (LinesToGCode.Zrapid,), "", "M30 (Program End)", "%"])
+    return lines
+
+def run():
+    '''Runs the macro on the current selection'''
+    with MacroProfiler.start('PocketToGCode') as prof:
+        with prof.phase('selection'):
+            face = selectedFace(Gui.Selection.getSelectionEx())
+            loops = faceRegion(face)
+            if LinesToGCode.useZDepth:
+                Z = round(face.OuterWire.Vertexes[0].Z,3) - LinesToGCode.G54[2]
+            else:
+                Z = LinesToGCode.Zcut
+        prof.count('vertexes', sum([len(loop) for loop in loops]))
+
+        with prof.phase('geometry'):
+            rings = Pocket.pocketRings(loops, toolDiameter, stepover)
+            path = Pocket.pocketPath(rings, maxLink * stepover * toolDiameter)
+        prof.count('rings', len(rings))
+        if not rings:
+            printfc("The tool doesn't fit in the pocket\n")
+
+        with prof.phase('gcode'):
+            printfc("\n".join(pocketGCode(path, Z)) + "\n")
+
+if __name__ == '__main__':
+    run()
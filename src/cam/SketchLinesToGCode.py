@@ -22,14 +22,30 @@
 A macro to convert selected sketcher lines (in-order) into Basic GCode
 Note: this is an older version
 @see: LinesToGCode.py for a more advanced version
+
+With wholeSketch set the sketch only needs to be selected (in the tree; no edit
+mode).  Its geometry is read once into arrays, construction geometry is skipped
+and the lines, arcs and circles are chained and oriented automatically.  Each
+chain is cut in turn (nearest first) with a rapid move between them.  Otherwise
+select the sketch's edges in order while editing it.
 '''
 
-import FreeCADGui as Gui, FreeCAD, Part, math
-from itertools import izip_longest
-from pivy import coin
+import FreeCADGui as Gui, FreeCAD, Part
+import numpy
+from utility import MacroProfiler
 
 printfc = FreeCAD.Console.PrintMessage
 
+## Begin Settings ##
+wholeSketch = True      # False to use the (edit mode) selection order
+Zval = -3.0
+Zrapid = 5.0            # height for the rapid moves between chains
+joinTolerance = 1e-6    # end points closer than this are joined
+## end settings ##
+
+# geometry kinds in sketchArrays
+LINE, ARC, CIRCLE = 0, 1, 2
+
 def vertexString(vert):
     return "%s|%s|%s" % (vert.X, vert.Y, vert.Z)
 def vectorString(vect):
@@ -38,53 +54,224 @@ def vectorString(vect):
 def toStr(line):
     return "Line [%s -> %s]" % (vertexString(line.Vertexes[0]),vertexString(line.Vertexes[1]))
 
-printfc("starting\n")
+def isConstruction(sketch, geometry, index):
+    '''Checks if the geometry is construction geometry (older FreeCAD versions
+    keep the flag on the geometry, newer ones on the sketch)'''
+    if hasattr(geometry, 'Construction'):
+        return geometry.Construction
+    if hasattr(sketch, 'getConstruction'):
+        return sketch.getConstruction(index)
+    return False
 
-Zval = -3.0
+def sketchArrays(sketch):
+    '''Reads the lines, arcs and circles of a sketch (skipping construction
+    geometry).  Returns a dict of arrays: index (into sketch.Geometry), kind,
+    start, end, center (2D, in sketch coordinates) and radius, plus skipped (the
+    number of unsupported geometries).'''
+    lineTypes = (Part.Line, getattr(Part, 'LineSegment', Part.Line))
+    geometries = sketch.Geometry
+    index, kind, coords, radius = [], [], [], []
+    skipped = 0
+    for i, geo in enumerate(geometries):
+        if isConstruction(sketch, geo, i):
+            continue
+        if isinstance(geo, lineTypes):
+            s, e = geo.StartPoint, geo.EndPoint
+            kind.append(LINE)
+            coords.append((s.x, s.y, e.x, e.y, 0.0, 0.0))
+            radius.append(0.0)
+        elif isinstance(geo, Part.ArcOfCircle):
+            s, e, c = geo.StartPoint, geo.EndPoint, geo.Center
+            kind.append(ARC)
+            coords.append((s.x, s.y, e.x, e.y, c.x, c.y))
+            radius.append(geo.Radius)
+        elif isinstance(geo, Part.Circle):
+            c = geo.Center
+            kind.append(CIRCLE)
+            coords.append((c.x + geo.Radius, c.y, c.x + geo.Radius, c.y, c.x, c.y))
+            radius.append(geo.Radius)
+        else:
+            skipped += 1
+            continue
+        index.append(i)
+    coords = numpy.array(coords, dtype=float).reshape(-1, 6)
+    return {'index': numpy.array(index, dtype=int), 'kind': numpy.array(kind, dtype=numpy.int8),
+            'start': coords[:, 0:2], 'end': coords[:, 2:4], 'center': coords[:, 4:6],
+            'radius': numpy.array(radius, dtype=float), 'skipped': skipped}
+
+def chainSketch(start, end, tolerance=joinTolerance):
+    '''Chains the (N, 2) start/end points into paths.  Returns a list of chains,
+    each a list of (geometry number, reversed) tuples in cutting order.'''
+    count = len(start)
+    keys = numpy.round(numpy.concatenate((start, end)) / tolerance).astype(numpy.int64)
+    unique, nodes = numpy.unique(keys, axis=0, return_inverse=True)
+    nodes = nodes.ravel()
+    startNode = nodes[:count].tolist()
+    endNode = nodes[count:].tolist()
+
+    incident = {}
+    for i in range(count):
+        incident.setdefault(startNode[i], []).append(i)
+        if endNode[i] != startNode[i]:
+            incident.setdefault(endNode[i], []).append(i)
+
+    # open chains start at a dead end, then whatever is left are loops
+    used = [False] * count
+    chains = []
+    deadEnds = [i for i in range(count) if len(incident[startNode[i]]) == 1 or len(incident[endNode[i]]) == 1]
+    for first in deadEnds + list(range(count)):
+        if used[first]:
+            continue
+        if len(incident[startNode[first]]) > 1 and len(incident[endNode[first]]) == 1:
+            node = endNode[first]
+        else:
+            node = startNode[first]
+        chain = []
+        geo = first
+        while geo is not None:
+            used[geo] = True
+            reverse = node != startNode[geo]
+            chain.append((geo, reverse))
+            node = startNode[geo] if reverse else endNode[geo]
+            geo = None
+            for other in incident[node]:
+                if not used[other]:
+                    geo = other
+                    break
+        chains.append(chain)
+    return chains
+
+def orderChains(chains, start, end, position=(0.0, 0.0)):
+    '''Orders the chains so each starts at the one nearest to where the last
+    finished (open chains may be reversed to do so).'''
+    def ends(chain):
+        geo, reverse = chain[0]
+        first = end[geo] if reverse else start[geo]
+        geo, reverse = chain[-1]
+        last = start[geo] if reverse else end[geo]
+        return first, last
+
+    remaining = list(chains)
+    points = numpy.array([ends(chain) for chain in remaining]).reshape(-1, 2, 2)
+    closed = numpy.all(numpy.abs(points[:, 0] - points[:, 1]) <= joinTolerance, axis=1)
+    ordered = []
+    position = numpy.array(position, dtype=float)
+    while remaining:
+        distance = numpy.sqrt(((points - position) ** 2).sum(axis=2))
+        distance[closed, 1] = numpy.inf
+        best = int(numpy.argmin(distance.min(axis=1)))
+        chain = remaining.pop(best)
+        if distance[best, 1] < distance[best, 0]:
+            chain = [(geo, not reverse) for geo, reverse in reversed(chain)]
+            position = points[best, 0]
+        else:
+            position = points[best, 1]
+        ordered.append(chain)
+        points = numpy.delete(points, best, axis=0)
+        closed = numpy.delete(closed, best)
+    return ordered
+
+def sketchGCode(arrays, chains):
+    '''Makes the GCode lines to cut the chains'''
+    kind, start, end, center = arrays['kind'], arrays['start'], arrays['end'], arrays['center']
+    lines = []
+    for chain in chains:
+        geo, reverse = chain[0]
+        x, y = end[geo] if reverse else start[geo]
+        lines.append("G00 Z%s" % (Zrapid,))
+        lines.append("G00 X%s Y%s" % (round(x, 3), round(y, 3)))
+        lines.append("G01 Z%s" % (Zval,))
+        for geo, reverse in chain:
+            fromPoint, toPoint = (end[geo], start[geo]) if reverse else (start[geo], end[geo])
+            X, Y = round(toPoint[0], 3), round(toPoint[1], 3)
+            if kind[geo] == LINE:
+                lines.append("G01 X%s Y%s Z%s" % (X, Y, Zval))
+            else:
+                # sketch arcs run anticlockwise from start to end
+                I = round(center[geo][0] - fromPoint[0], 3) + 0.0
+                J = round(center[geo][1] - fromPoint[1], 3) + 0.0
+                lines.append("%s X%s Y%s Z%s I%s J%s" % ('G02' if reverse else 'G03', X, Y, Zval, I, J))
+    if chains:
+        lines.append("G00 Z%s" % (Zrapid,))
+    return lines
+
+def selectedGCode(sketch, edgeNames):
+    '''Makes the GCode lines for the sketch edges selected (in order) in edit mode'''
+    lines = []
+    geometries = sketch.Geometry
+
+    # get first point
+    startName = edgeNames[0]
+    if startName.startswith("Vertex"):
+        nextVert = sketch.Shape.Vertexes[int(startName[6:])]
+        lines.append("G01 X%s Y%s Z%s" % (round(nextVert.X,3), round(nextVert.Y,3), Zval))
+        edgeNames = edgeNames[1:]
+
+    # process from line to line
+    lastEdge = None
+    lastVerts = []
+    currentVert = None
+    for edgeName in edgeNames:
+        if edgeName.startswith("Edge"):
+            edge = geometries[int(edgeName[4:])]
+            if lastEdge:
+                if vectorString(edge.StartPoint) in lastVerts:
+                    nextVert = edge.StartPoint
+                    currentVert = edge.EndPoint
+                elif vectorString(edge.EndPoint) in lastVerts:
+                    nextVert = edge.EndPoint
+                    currentVert = edge.StartPoint
+                else:
+                    printfc("Lines don't join\nEdge: %s\nLast edge: %s\n" % (toStr(edge), toStr(lastEdge)))
+                    break
+
+                X = round(nextVert.x,3)
+                Y = round(nextVert.y,3)
+                if type(edge.Curve) == Part.Line:
+                    lines.append("G01 X%s Y%s Z%s" % (X, Y, Zval))
+                elif type(edge.Curve) == Part.Circle:
+                    cen = edge.Curve.Center
+                    I = round(currentVert.x - cen.x,3)
+                    J = round(currentVert.y - cen.y,3)
+                    lines.append("G02 X%s Y%s Z%s I%s J%s" % (X, Y, Zval, I, J))
+
+            lastVerts = [vectorString(edge.StartPoint), vectorString(edge.EndPoint)]
+            lastEdge = edge
+        else:
+            printfc( "skipping %s\n" % edgeName)
 
+    if currentVert:
+        lines.append("G01 X%s Y%s Z%s" % (round(currentVert.x,3), round(currentVert.y,3), Zval))
+    return lines
 
-sel = Gui.Selection.getSelectionEx()[0]
-sketch = Gui.Selection.getSelection()[0]
-edgeNames = sel.SubElementNames
-
-# get first point
-startName = edgeNames[0]
-if startName.startswith("Vertex"):
-    nextVert = sketch.Shape.Vertexes[int(startName[6:])]
-    printfc("G01 X%s Y%s Z%s\n" % (round(nextVert.X,3), round(nextVert.Y,3), Zval))
-    edgeNames = edgeNames[1:]
-
-# process from line to line
-lastEdge = None
-lastVerts = []
-for edgeName in edgeNames:
-    if edgeName.startswith("Edge"):
-        edge = sketch.Geometry[int(edgeName[4:])]
-        if lastEdge:
-            if vectorString(edge.StartPoint) in lastVerts:
-                nextVert = edge.StartPoint
-                currentVert = edge.EndPoint
-            elif vectorString(edge.EndPoint) in lastVerts:
-                nextVert = edge.EndPoint
-                currentVert = edge.StartPoint
+def run():
+    '''Runs the macro on the current selection'''
+    printfc("starting\n")
+    with MacroProfiler.start('SketchLinesToGCode') as prof:
+        with prof.phase('selection'):
+            sketch = Gui.Selection.getSelection()[0]
+            if wholeSketch:
+                arrays = sketchArrays(sketch)
+                if arrays['skipped']:
+                    printfc("skipping %s unsupported geometries\n" % (arrays['skipped'],))
             else:
-                printfc("Lines don't join\nEdge: %s\nLast edge: %s\n" % (toStr(edge), toStr(lastEdge)))
-                break
-            
-            X = round(nextVert.x,3)
-            Y = round(nextVert.y,3)
-            if type(edge.Curve) == Part.Line:
-                printfc("G01 X%s Y%s Z%s\n" % (X, Y, Zval))
-            elif type(edge.Curve) == Part.Circle:
-                cen = edge.Curve.Center
-                I = round(currentVert.x - cen.x,3)
-                J = round(currentVert.y - cen.y,3)
-                printfc("G02 X%s Y%s Z%s I%s J%s\n" % (X, Y, Zval, I, J))
-            
-        lastVerts = [vectorString(edge.StartPoint), vectorString(edge.EndPoint)]
-        lastEdge = edge
-    else:
-        printfc( "skipping %s\n" % edgeName)
-
-if currentVert:
-    printfc("G01 X%s Y%s Z%s\n" % (round(currentVert.x,3), round(currentVert.y,3), Zval))
\ No newline at end of file
+                edgeNames = Gui.Selection.getSelectionEx()[0].SubElementNames
+
+        with prof.phase('geometry'):
+            if wholeSketch:
+                chains = orderChains(chainSketch(arrays['start'], arrays['end']), arrays['start'], arrays['end'])
+                prof.count('elements', len(arrays['kind']))
+                prof.count('chains', len(chains))
+            else:
+                prof.count('elements', len(edgeNames))
+
+        with prof.phase('gcode'):
+            if wholeSketch:
+                lines = sketchGCode(arrays, chains)
+            else:
+                lines = selectedGCode(sketch, edgeNames)
+            if lines:
+                printfc("\n".join(lines) + "\n")
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,71 @@
+######################################################################################
+#    This file is part of the FreeCAD Macro Suite                                    #
+#                                                                                    #
+#    Copyright (C) 2013 Andrew Robinson (andrewjrobinson@gmail.com)                  #
+#                                                                                    #
+#    This library is free software; you can redistribute it and/or                   #
+#    modify it under the terms of the GNU Lesser General Public                      #
+#    License as published by the Free Software Foundation; either                    #
+#    version 2.1 of the License, or (at your option) any later version.              #
+#                                                                                    #
+#    This library is distributed in the hope that it will be useful,                 #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of                  #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU               #
+#    Lesser General Public License for more details.                                 #
+#                                                                                    #
+#    You should have received a copy of the GNU Lesser General Public                #
+#    License along with this library; if not, write to the Free Software             #
+#    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA  #
+######################################################################################
+
+'''
+Imports an STL file as a solid (or shell) with its coplanar triangles merged into
+single faces.
+
+The file is read straight into NumPy arrays (binary files are memory-mapped),
+vertexes are welded and coplanar triangles merged before any OCC shapes are made,
+so only one face per merged polygon is ever created.  This replaces importing the
+mesh, converting it to a shape, then running MergeFaces and MakeSolid.
+
+@see: MeshMerge.py
+'''
+
+import FreeCAD, Part
+from nonparametric import MeshMerge
+from utility import MacroProfiler
+
+printfc = FreeCAD.Console.PrintMessage
+
+## Begin Settings ##
+stlFile = '/home/arobinson/Documents/part.stl'
+weldTolerance = 1e-6        # vertexes closer than this are merged
+angleTolerance = 1e-4       # (radians) between the normals of coplanar triangles
+distanceTolerance = 1e-5    # maximum distance from a merged face's plane
+makeSolid = True            # False to make a shell (e.g. for open meshes)
+## end settings ##
+
+def run():
+    '''Runs the macro'''
+    with MacroProfiler.start('ImportStl') as prof:
+        with prof.phase('load'):
+            triangles = MeshMerge.readStl(stlFile)
+        prof.count('triangles', len(triangles))
+
+        with prof.phase('geometry'):
+            points, faces = MeshMerge.weldTriangles(triangles, weldTolerance)
+            polygons, openGroups = MeshMerge.mergeCoplanar(points, faces, angleTolerance, distanceTolerance)
+        MeshMerge.reportOpenGroups(openGroups)
+        printfc("%s triangles merged into %s faces\n" % (len(faces), len(polygons)))
+        prof.count('faces', len(polygons))
+
+        with prof.phase('occ'):
+            shape = Part.makeShell(MeshMerge.polygonFaces(points, polygons))
+            shape.sewShape(weldTolerance)
+            if makeSolid:
+                shape = Part.makeSolid(shape)
+
+        with prof.phase('show'):
+            Part.show(shape)
+
+if __name__ == '__main__':
+    run()
@@ -26,7 +26,8 @@ they have one vertex in common OR 1 vertex and 1 edge OR 3 vertexes etc.
 @see: MergeFaces.py for a macro to join 2 (or more) planar faces.
 '''
 
-import FreeCADGui as Gui, FreeCAD, Part, math
+import FreeCADGui as Gui, FreeCAD, Part
+from utility import MacroProfiler
 
 printfc = FreeCAD.Console.PrintMessage
 
@@ -40,21 +41,30 @@ def vertTuple(vert):
     '''Makes a 3-tuple representing a vertex'''
     return (vert.X, vert.Y, vert.Z)
 
+def run():
+    '''Runs the macro on the current selection'''
+    with MacroProfiler.start('MakeFace') as prof:
+        # 3 unique verts (from any sub-object selection)
+        with prof.phase('selection'):
+            verts = set([])
+            for sel in Gui.Selection.getSelectionEx():
+                for obj in sel.SubObjects:
+                    prof.count('subObjects')
+                    for vert in obj.Vertexes:
+                        verts.add(vertTuple(vert))
 
-# 3 unique verts (from any sub-object selection)
-verts = set([])
-for sel in Gui.Selection.getSelectionEx():
-    for obj in sel.SubObjects:
-        for vert in obj.Vertexes:
-            verts.add(vertTuple(vert))
-
-if len(verts) != 3:
-    printfc("You must only select 3 vertexes\n")
-else:
-    vertexes = []
-    for v in verts:
-        vertexes.append(tupleVert(v))
-    edges = [Part.Edge(vertexes[0], vertexes[1]), Part.Edge(vertexes[1], vertexes[2]), Part.Edge(vertexes[2], vertexes[0])]
-    wire = Part.Wire(edges)
-    face = Part.Face(wire)
-    Part.show(face)
+        if len(verts) != 3:
+            printfc("You must only select 3 vertexes\n")
+        else:
+            with prof.phase('occ'):
+                vertexes = []
+                for v in verts:
+                    vertexes.append(tupleVert(v))
+                edges = [Part.Edge(vertexes[0], vertexes[1]), Part.Edge(vertexes[1], vertexes[2]), Part.Edge(vertexes[2], vertexes[0])]
+                wire = Part.Wire(edges)
+                face = Part.Face(wire)
+            with prof.phase('show'):
+                Part.show(face)
+
+if __name__ == '__main__':
+    run()
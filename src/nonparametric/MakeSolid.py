@@ -19,29 +19,87 @@
 ######################################################################################
 
 '''
-Makes a solid from a bunch of faces.
+Makes a solid from a bunch of faces, or from a mesh object (Mesh::Feature, e.g. an
+imported STL).  Mesh objects are handled as arrays and their coplanar triangles are
+merged before any faces are made (in a worker thread, with a progress dialog and
+cancel button).
 
 @see: MakeFace.py, to make triangles to fill in gaps between other objects
 @see: MergeFaces.py, to reduce the number of faces
+@see: ImportStl.py, to import an STL file as a solid
 
 @todo: This macro currently doesn't produce a proper solid.  It looks ok but doesn't cooperate with the boolean operators.
 '''
 
-import FreeCADGui as Gui, FreeCAD, Part, math
+import FreeCADGui as Gui, FreeCAD, Part
+import numpy
+from nonparametric import MeshMerge
+from utility import MacroProfiler, BackgroundTask
 
 printfc = FreeCAD.Console.PrintMessage
 
-faces = []
+def meshArrays(mesh):
+    '''Gets the (points, faces) arrays of a Mesh'''
+    points, facets = mesh.Topology
+    points = numpy.array([(p.x, p.y, p.z) for p in points], dtype=float)
+    return points, MeshMerge.removeDegenerate(numpy.array(facets, dtype=numpy.int64).reshape(-1, 3))
 
-for sel in Gui.Selection.getSelectionEx():
-    if len(sel.Object.Shape.Faces):
-        faces.extend(sel.Object.Shape.Faces)
-    else:
-        faces.extend(sel.SubObjects)
-    
+def mergeMeshes(meshes, progress=BackgroundTask.noProgress):
+    '''Merges the coplanar triangles of each (points, faces) mesh.  Returns a 2-tuple
+    of (list of (points, polygons) tuples, number of open groups).  progress is
+    called with (done, total) triangles.  @see: MeshMerge.mergeCoplanar'''
+    total = sum([len(triangles) for points, triangles in meshes])
+    result = []
+    openGroups = 0
+    done = 0
+    for points, triangles in meshes:
+        def meshProgress(part, parts=None, done=done, count=len(triangles)):
+            progress(done + (count * part // parts if parts else 0), total)
+        polygons, meshOpenGroups = MeshMerge.mergeCoplanar(points, triangles, progress=meshProgress)
+        result.append((points, polygons))
+        openGroups += meshOpenGroups
+        done += len(triangles)
+    progress(total, total)
+    return result, openGroups
 
-shell=Part.makeShell(faces)
-solid=Part.makeSolid(shell)
-Part.show(solid)
+def run():
+    '''Runs the macro on the current selection'''
+    with MacroProfiler.start('MakeSolid') as prof:
+        with prof.phase('selection'):
+            faces = []
+            meshes = []
 
+            for sel in Gui.Selection.getSelectionEx():
+                if hasattr(sel.Object, 'Mesh'):
+                    meshes.append(meshArrays(sel.Object.Mesh))
+                elif len(sel.Object.Shape.Faces):
+                    faces.extend(sel.Object.Shape.Faces)
+                else:
+                    faces.extend(sel.SubObjects)
 
+        # merge mesh triangles in a worker thread (the OCC shapes are made on this one)
+        merged, openGroups = [], 0
+        if meshes:
+            with prof.phase('geometry'):
+                triangleCount = sum([len(triangles) for points, triangles in meshes])
+                try:
+                    merged, openGroups = BackgroundTask.run('Merging mesh faces', mergeMeshes, (meshes,), triangleCount, 'faces')
+                except BackgroundTask.Cancelled:
+                    return
+
+        with prof.phase('occ'):
+            MeshMerge.reportOpenGroups(openGroups)
+            for points, polygons in merged:
+                faces.extend(MeshMerge.polygonFaces(points, polygons))
+            if meshes:
+                printfc("%s triangles merged into %s faces\n" % (triangleCount, sum([len(p) for m, p in merged])))
+            prof.count('faces', len(faces))
+            shell=Part.makeShell(faces)
+            if meshes:
+                shell.sewShape()
+            solid=Part.makeSolid(shell)
+        with prof.phase('show'):
+            Part.show(solid)
+
+if __name__ == '__main__':
+    run()
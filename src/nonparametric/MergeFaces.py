@@ -22,9 +22,19 @@
 Makes a single face from multiple (must be planer).  e.g. if you have two adjacent 
 triangle faces that make up a square you can use this to macro to create a new object 
 with a single square face.
+
+The shared edges are found (and the boundary chained) with NumPy arrays, so merging
+thousands of triangles stays fast.  The boundary is found in a worker thread (with
+a progress dialog and cancel button) so FreeCAD stays responsive.
+
+@see: MeshMerge.py
+@see: BackgroundTask.py
 '''
 
-import FreeCADGui as Gui, FreeCAD, Part, math
+import FreeCADGui as Gui, FreeCAD, Part
+import numpy
+from nonparametric import MeshMerge
+from utility import MacroProfiler, BackgroundTask
 
 printfc = FreeCAD.Console.PrintMessage
 
@@ -36,76 +46,77 @@ def vertTuple(vert):
     '''Makes a 3-tuple representing a vertex'''
     return (vert.X, vert.Y, vert.Z)
 
-def edgeTuples(edge):
-    '''Makes a 2-tuple of 3-tuples representing the edge (sorted)'''
-    v1 = vertTuple(edge.Vertexes[0])
-    v2 = vertTuple(edge.Vertexes[1])
-    if v1 < v2:
-        return (v1,v2)
-    return (v2,v1)
-
-def appendDict(d, k, v):
-    '''Appends v to element k of dict d (safely)'''
-    if k in d:
-        d[k].append(v)
-    else:
-        d[k] = [v]
-
-# count the edges
-edgeCount = {}
-faces = Gui.Selection.getSelection()
-for face in faces:
-    for edge in face.Shape.Edges:
-        et = edgeTuples(edge)
-        if et in edgeCount:
-            edgeCount[et] += 1
-        else:
-            edgeCount[et] = 1
-
-# printfc("Edge Counts: %s\n" % (edgeCount,))
-
-# remove any that are duplicates
-dirarcs = {}
-start = None
-for edge, c in edgeCount.items():
-    if c == 1:
-        appendDict(dirarcs, edge[0], edge[1])
-        appendDict(dirarcs, edge[1], edge[0])
-        start = edge[0]
-
-# printfc("Directed Arcs: %s\n" % (dirarcs,))
-
-# follow edges
-vert = start
-path = []
-while True:
-    nextVerts = dirarcs[vert]
-    found = False
-    for v in nextVerts:
-        if v not in path:
-            vert = v
-            path.append(v)
-            found = True
-            break
-    if not found:
-        break
-    
-# printfc("Path: %s\n" % (path,))
-
-# convert back to edges
-edges = []
-lastv = path[-1]
-for v in path:
-    edges.append(Part.Edge(Part.Vertex(*lastv),Part.Vertex(*v)))
-    lastv = v
-
-# printfc("Edges: %s\n" % (edges,))
-
-# make new part
-wire = Part.Wire(edges)
-face = Part.Face(wire)
-Part.show(face)
-
-# hide the originals
-for face in faces:
-    face.ViewObject.hide()
+def shapeSegments(shapes):
+    '''Gets the end points of every edge of the shapes as an (E, 2, 3) array'''
+    segments = []
+    for shape in shapes:
+        for edge in shape.Edges:
+            v1, v2 = edge.Vertexes[0], edge.Vertexes[-1]
+            segments.append((v1.X, v1.Y, v1.Z, v2.X, v2.Y, v2.Z))
+    return numpy.array(segments, dtype=float).reshape(-1, 2, 3)
+
+def segmentsPath(segments, tolerance=1e-7, progress=BackgroundTask.noProgress):
+    '''Finds the outside boundary of the (planar) faces whose edges are segments
+    i.e. the edges that are only used once.  Returns a list of vertex 3-tuples in
+    order around it.'''
+    # end points of every edge, counted and chained as arrays
+    points, loops = MeshMerge.edgeBoundaryLoops(segments, tolerance, progress)
+    if not loops:
+        return []
+
+    # holes are inside the outer loop so it has the largest area
+    areas = MeshMerge.loopAreas(points, loops)
+    outer = loops[int(numpy.argmax((areas * areas).sum(axis=1)))]
+    return [tuple(p) for p in points[outer].tolist()]
+
+def boundaryPath(shapes, tolerance=1e-7):
+    '''Finds the outside boundary of the (planar) shapes i.e. the edges that are
+    only used once.  Returns a list of vertex 3-tuples in order around it.'''
+    return segmentsPath(shapeSegments(shapes), tolerance)
+
+def pathFace(path):
+    '''Makes a face from a closed path of vertex 3-tuples'''
+    # convert back to edges
+    edges = []
+    lastv = path[-1]
+    for v in path:
+        edges.append(Part.Edge(Part.Vertex(*lastv),Part.Vertex(*v)))
+        lastv = v
+
+    # printfc("Edges: %s\n" % (edges,))
+
+    # make new part
+    wire = Part.Wire(edges)
+    return Part.Face(wire)
+
+def mergeFaces(shapes):
+    '''Makes a single face from the (planar) shapes'''
+    return pathFace(boundaryPath(shapes))
+
+def run():
+    '''Runs the macro on the current selection'''
+    with MacroProfiler.start('MergeFaces') as prof:
+        with prof.phase('selection'):
+            faces = Gui.Selection.getSelection()
+            segments = shapeSegments([face.Shape for face in faces])
+        prof.count('faces', len(faces))
+
+        with prof.phase('geometry'):
+            try:
+                path = BackgroundTask.run('Merging faces', segmentsPath, (segments,), len(faces), 'faces')
+            except BackgroundTask.Cancelled:
+                return
+
+        with prof.phase('occ'):
+            face = pathFace(path)
+        prof.count('edges', len(path))
+
+        with prof.phase('show'):
+            Part.show(face)
+
+            # hide the originals
+            for face in faces:
+                face.ViewObject.hide()
+
+if __name__ == '__main__':
+    run()
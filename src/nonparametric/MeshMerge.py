@@ -0,0 +1,382 @@
+######################################################################################
+#    This file is part of the FreeCAD Macro Suite                                    #
+#                                                                                    #
+#    Copyright (C) 2013 Andrew Robinson (andrewjrobinson@gmail.com)                  #
+#                                                                                    #
+#    This library is free software; you can redistribute it and/or                   #
+#    modify it under the terms of the GNU Lesser General Public                      #
+#    License as published by the Free Software Foundation; either                    #
+#    version 2.1 of the License, or (at your option) any later version.              #
+#                                                                                    #
+#    This library is distributed in the hope that it will be useful,                 #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of                  #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU               #
+#    Lesser General Public License for more details.                                 #
+#                                                                                    #
+#    You should have received a copy of the GNU Lesser General Public                #
+#    License along with this library; if not, write to the Free Software             #
+#    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA  #
+######################################################################################
+
+'''
+Array based mesh to solid pipeline.  Not a macro itself; it is used by ImportStl.py,
+MakeSolid.py (for mesh objects) and MergeFaces.py.
+
+Triangles are only ever held in NumPy arrays: binary STL files are memory-mapped,
+ASCII STL files are streamed, coincident vertexes are welded in one pass and
+coplanar, edge-connected triangles are grouped and reduced to their boundary
+polygons without making a shape per triangle.  OCC faces are only made for the
+final (merged) polygons.
+
+The Python loops (chaining boundary edges) call progress(done, total) every few
+thousand edges so a BackgroundTask can show progress and cancel them.
+
+e.g.
+points, faces = weldTriangles(readStl('part.stl'))
+solid = meshToSolid(points, faces)
+'''
+
+import os, struct
+import numpy
+import FreeCAD, Part
+from utility import BackgroundTask
+
+# binary STL record
+stlDtype = numpy.dtype([('normal', '<f4', (3,)), ('vertices', '<f4', (3, 3)), ('attribute', '<u2')])
+
+# ASCII STL vertex lines parsed per block
+asciiBlockLines = 65536
+
+
+def readStl(path):
+	'''Reads the triangles of a binary (memory-mapped) or ASCII (streamed) STL file.
+	Returns an (N, 3, 3) float32 array.'''
+	size = os.path.getsize(path)
+	with open(path, 'rb') as f:
+		header = f.read(84)
+	if len(header) == 84:
+		count = struct.unpack('<I', header[80:84])[0]
+		if size == 84 + 50 * count:
+			if count == 0:
+				return numpy.zeros((0, 3, 3), dtype=numpy.float32)
+			return numpy.memmap(path, dtype=stlDtype, mode='r', offset=84, shape=(count,))['vertices']
+	return readAsciiStl(path)
+
+def readAsciiStl(path):
+	'''Reads the triangles of an ASCII STL file a block of lines at a time.  Returns
+	an (N, 3, 3) float32 array.'''
+	blocks = []
+	lines = []
+	with open(path, 'r') as f:
+		for line in f:
+			line = line.strip()
+			if line.startswith('vertex'):
+				lines.append(line[6:])
+				if len(lines) == asciiBlockLines:
+					blocks.append(numpy.fromstring(' '.join(lines), dtype=numpy.float32, sep=' '))
+					lines = []
+	if lines:
+		blocks.append(numpy.fromstring(' '.join(lines), dtype=numpy.float32, sep=' '))
+	if not blocks:
+		return numpy.zeros((0, 3, 3), dtype=numpy.float32)
+	return numpy.concatenate(blocks).reshape(-1, 3, 3)
+
+def weldPoints(coords, tolerance):
+	'''Merges points (an (N, 3) array) that fall in the same tolerance sized cell.
+	Returns a 2-tuple of (unique points, index of each input point in them).'''
+	keys = numpy.round(numpy.asarray(coords, dtype=float) / tolerance).astype(numpy.int64)
+	unique, index, inverse = numpy.unique(keys, axis=0, return_index=True, return_inverse=True)
+	return numpy.asarray(coords[index], dtype=float), inverse.ravel()
+
+def weldTriangles(triangles, tolerance=1e-6):
+	'''Welds the vertexes of an (N, 3, 3) triangle array and drops the triangles that
+	collapse.  Returns a 2-tuple of (points (M, 3), faces (K, 3) vertex indexes).'''
+	points, inverse = weldPoints(triangles.reshape(-1, 3), tolerance)
+	return points, removeDegenerate(inverse.reshape(-1, 3))
+
+def removeDegenerate(faces):
+	'''Drops triangles that use the same vertex twice'''
+	faces = numpy.asarray(faces, dtype=numpy.int64)
+	good = (faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 2] != faces[:, 0])
+	return faces[good]
+
+def triangleNormals(points, faces):
+	'''Gets the unit normal and area of each triangle'''
+	tri = points[faces]
+	cross = numpy.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+	length = numpy.sqrt((cross * cross).sum(axis=1))
+	normals = cross / numpy.where(length > 0, length, 1.0)[:, None]
+	return normals, length / 2.0
+
+def adjacentPairs(faces):
+	'''Finds the pairs of triangles that share an edge.  Returns 2 arrays of
+	triangle indexes.'''
+	edges = numpy.sort(faces[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2), axis=1)
+	tri = numpy.repeat(numpy.arange(len(faces)), 3)
+	order = numpy.lexsort((edges[:, 1], edges[:, 0]))
+	edges = edges[order]
+	tri = tri[order]
+	same = numpy.all(edges[1:] == edges[:-1], axis=1)
+	return tri[:-1][same], tri[1:][same]
+
+def components(count, a, b):
+	'''Labels the connected components of count nodes joined by the (a[i], b[i])
+	links (hook and compress).  Returns the smallest node index of each node's component.'''
+	labels = numpy.arange(count)
+	while len(a):
+		la = labels[a]
+		lb = labels[b]
+		if numpy.array_equal(la, lb):
+			break
+		low = numpy.minimum(la, lb)
+		numpy.minimum.at(labels, la, low)
+		numpy.minimum.at(labels, lb, low)
+		while True:
+			jumped = labels[labels]
+			if numpy.array_equal(jumped, labels):
+				break
+			labels = jumped
+	return labels
+
+def coplanarGroups(points, faces, angleTolerance=1e-4, distanceTolerance=1e-5):
+	'''Groups edge-connected triangles that lie in the same plane.  Returns a
+	2-tuple of (group of each triangle (0..G-1), unit normal of each group).'''
+	count = len(faces)
+	normals, areas = triangleNormals(points, faces)
+	offsets = (normals * points[faces[:, 0]]).sum(axis=1)
+
+	a, b = adjacentPairs(faces)
+	coplanar = ((normals[a] * normals[b]).sum(axis=1) >= numpy.cos(angleTolerance)) \
+			& (numpy.abs(offsets[a] - offsets[b]) <= distanceTolerance)
+	labels = components(count, a[coplanar], b[coplanar])
+
+	# group planes (area weighted); groups that drifted out of plane go back to triangles
+	groupNormals = numpy.zeros((count, 3))
+	numpy.add.at(groupNormals, labels, normals * areas[:, None])
+	length = numpy.sqrt((groupNormals * groupNormals).sum(axis=1))
+	groupNormals /= numpy.where(length > 0, length, 1.0)[:, None]
+	reference = points[faces[labels, 0]]
+	distance = numpy.abs(((points[faces] - reference[:, None, :]) * groupNormals[labels][:, None, :]).sum(axis=2)).max(axis=1)
+	worst = numpy.zeros(count)
+	numpy.maximum.at(worst, labels, distance)
+	bent = worst[labels] > distanceTolerance
+	labels = numpy.where(bent, numpy.arange(count), labels)
+	groupNormals[bent] = normals[bent]
+
+	unique, groups = numpy.unique(labels, return_inverse=True)
+	return groups.ravel(), groupNormals[unique]
+
+def boundaryEdges(faces, groups):
+	'''Finds the edges on the boundary of each group (used by only one of its
+	triangles).  Returns a 2-tuple of (directed edges (E, 2), group of each edge).'''
+	directed = faces[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2)
+	edgeGroups = numpy.repeat(groups, 3)
+	keys = numpy.column_stack((edgeGroups, numpy.sort(directed, axis=1)))
+	unique, inverse, counts = numpy.unique(keys, axis=0, return_inverse=True, return_counts=True)
+	boundary = counts[inverse.ravel()] == 1
+	return directed[boundary], edgeGroups[boundary]
+
+def chainLoops(edges, groups, points, normals, progress=BackgroundTask.noProgress):
+	'''Chains directed edges into closed loops (within each group).  Where a
+	group's boundary touches itself at a vertex (more than one edge starts there)
+	each edge is followed by the one turning furthest clockwise about the group
+	normal, so the outer boundary and each hole stay separate loops.  Returns a
+	list of (group, array of vertex indexes) tuples.'''
+	if not len(edges):
+		return []
+	span = int(edges.max()) + 1
+	starts = groups * span + edges[:, 0]
+	order = numpy.argsort(starts, kind='mergesort')
+	sortedStarts = starts[order]
+	ends = groups * span + edges[:, 1]
+	first = numpy.searchsorted(sortedStarts, ends, side='left')
+	last = numpy.searchsorted(sortedStarts, ends, side='right')
+	successor = numpy.where(last > first, order[numpy.minimum(first, len(order) - 1)], -1)
+
+	# pinch vertexes: pick the successor by turning angle
+	pinched = numpy.nonzero(last - first > 1)[0]
+	if len(pinched):
+		direction = points[edges[:, 1]] - points[edges[:, 0]]
+		for e in pinched.tolist():
+			candidates = order[first[e]:last[e]]
+			normal = normals[groups[e]]
+			turn = numpy.arctan2(numpy.dot(numpy.cross(direction[e], direction[candidates]), normal),
+								numpy.dot(direction[candidates], direction[e]))
+			successor[e] = candidates[numpy.argmin(turn)]
+	successor = successor.tolist()
+
+	loops = []
+	visited = [False] * len(edges)
+	done = 0
+	for start in range(len(edges)):
+		if visited[start]:
+			continue
+		loop = []
+		e = start
+		while e >= 0 and not visited[e]:
+			visited[e] = True
+			loop.append(e)
+			e = successor[e]
+			done += 1
+			if done % 4096 == 0:
+				progress(done, len(edges))
+		if e == start and len(loop) >= 3:
+			loops.append((int(groups[start]), edges[loop, 0]))
+	progress(len(edges), len(edges))
+	return loops
+
+def chainUndirected(edges, progress=BackgroundTask.noProgress):
+	'''Chains undirected edges (E, 2) into loops.  Returns a list of arrays of vertex
+	indexes.  progress is called with (done, total) steps (two per edge).'''
+	total = 2 * len(edges)
+	incident = {}
+	for i, (a, b) in enumerate(edges.tolist()):
+		incident.setdefault(a, []).append(i)
+		incident.setdefault(b, []).append(i)
+		if i % 4096 == 0:
+			progress(i, total)
+	edgeList = edges.tolist()
+	used = [False] * len(edgeList)
+	loops = []
+	done = len(edgeList)
+	for start in range(len(edgeList)):
+		if used[start]:
+			continue
+		used[start] = True
+		first, vert = edgeList[start]
+		loop = [first]
+		while vert != first:
+			loop.append(vert)
+			done += 1
+			if done % 4096 == 0:
+				progress(done, total)
+			following = [e for e in incident[vert] if not used[e]]
+			if not following:
+				break
+			used[following[0]] = True
+			a, b = edgeList[following[0]]
+			vert = b if a == vert else a
+		if vert == first and len(loop) >= 3:
+			loops.append(numpy.array(loop))
+	progress(total, total)
+	return loops
+
+def edgeBoundaryLoops(segments, tolerance=1e-7, progress=BackgroundTask.noProgress):
+	'''Finds the loops formed by the segments (an (E, 2, 3) array of edge end
+	points) that are only used once, i.e. the boundary of a set of edge-sharing
+	faces.  Returns a 2-tuple of (points, list of loops of point indexes).
+	@see: chainUndirected for progress'''
+	progress(0)
+	points, inverse = weldPoints(numpy.asarray(segments, dtype=float).reshape(-1, 3), tolerance)
+	edges = numpy.sort(inverse.reshape(-1, 2), axis=1)
+	edges = edges[edges[:, 0] != edges[:, 1]]
+	unique, counts = numpy.unique(edges, axis=0, return_counts=True)
+	return points, chainUndirected(unique[counts == 1], progress)
+
+def _loopArrays(loops):
+	'''Concatenates loops.  Returns (vertex indexes, loop id, previous, next) arrays.'''
+	lengths = numpy.array([len(loop) for loop in loops])
+	starts = numpy.concatenate(([0], numpy.cumsum(lengths)[:-1]))
+	index = numpy.concatenate(loops)
+	loopId = numpy.repeat(numpy.arange(len(loops)), lengths)
+	position = numpy.arange(len(index)) - starts[loopId]
+	previous = numpy.where(position == 0, starts[loopId] + lengths[loopId] - 1, numpy.arange(len(index)) - 1)
+	following = numpy.where(position == lengths[loopId] - 1, starts[loopId], numpy.arange(len(index)) + 1)
+	return index, loopId, previous, following
+
+def loopAreas(points, loops):
+	'''Gets the area vector (normal * area) of each loop'''
+	index, loopId, previous, following = _loopArrays(loops)
+	cross = numpy.cross(points[index], points[index[following]])
+	areas = numpy.zeros((len(loops), 3))
+	numpy.add.at(areas, loopId, cross)
+	return areas / 2.0
+
+def simplifyLoops(points, loops, tolerance=1e-9):
+	'''Removes the vertexes that are on a straight line in every loop that uses
+	them (vertexes at a corner of any loop are kept so neighbouring faces still
+	meet vertex to vertex).'''
+	if not loops:
+		return loops
+	index, loopId, previous, following = _loopArrays(loops)
+	before = points[index] - points[index[previous]]
+	after = points[index[following]] - points[index]
+	cross = numpy.cross(before, after)
+	scale = numpy.sqrt((before * before).sum(axis=1) * (after * after).sum(axis=1))
+	straight = numpy.sqrt((cross * cross).sum(axis=1)) <= tolerance * numpy.maximum(scale, 1e-300)
+	corner = numpy.zeros(len(points), dtype=bool)
+	corner[index[~straight]] = True
+	keep = corner[index]
+	keptCounts = numpy.bincount(loopId[keep], minlength=len(loops))
+	result = numpy.split(index[keep], numpy.cumsum(keptCounts)[:-1])
+	return [kept if len(kept) >= 3 else loop for kept, loop in zip(result, loops)]
+
+def mergeCoplanar(points, faces, angleTolerance=1e-4, distanceTolerance=1e-5, progress=BackgroundTask.noProgress):
+	'''Merges edge-connected coplanar triangles into polygons.  Returns a 2-tuple of
+	(list of (outer loop, [hole loops]) tuples of vertex index arrays, number of
+	open groups).  Groups whose boundary can't be chained into closed loops (open
+	groups) are left as one polygon per triangle rather than dropped; pass their
+	number to reportOpenGroups (from the GUI thread).  progress is called with
+	(done, total) boundary edges chained.'''
+	progress(0)
+	groups, normals = coplanarGroups(points, faces, angleTolerance, distanceTolerance)
+	edges, edgeGroups = boundaryEdges(faces, groups)
+	chained = chainLoops(edges, edgeGroups, points, normals, progress)
+	loops = simplifyLoops(points, [loop for group, loop in chained])
+	loopGroups = numpy.array([group for group, loop in chained], dtype=numpy.int64)
+
+	# outer loops run anticlockwise around the group normal, holes clockwise
+	area = (loopAreas(points, loops) * normals[loopGroups]).sum(axis=1) if loops else numpy.zeros(0)
+	polygons = {}
+	holes = {}
+	for loop, group, a in zip(loops, loopGroups.tolist(), area.tolist()):
+		if a > 0:
+			if group not in polygons or a > polygons[group][1]:
+				polygons[group] = (loop, a)
+		else:
+			holes.setdefault(group, []).append(loop)
+
+	# every boundary edge of a group must be in one of its loops
+	groupCount = len(normals)
+	chainedEdges = numpy.bincount(loopGroups, weights=[len(loop) for group, loop in chained], minlength=groupCount)
+	broken = chainedEdges != numpy.bincount(edgeGroups, minlength=groupCount)
+	broken[[group for group in range(groupCount) if group not in polygons]] = True
+	for group in numpy.nonzero(broken)[0].tolist():
+		polygons.pop(group, None)
+
+	result = [(group, outer, holes.get(group, [])) for group, (outer, a) in polygons.items()]
+	triangles = numpy.nonzero(broken[groups])[0]
+	result.extend([(group, faces[t], []) for group, t in zip(groups[triangles].tolist(), triangles.tolist())])
+	result.sort(key=lambda polygon: polygon[0])
+	return [(outer, holeLoops) for group, outer, holeLoops in result], int(broken.sum())
+
+def reportOpenGroups(count):
+	'''Warns about the groups mergeCoplanar left as triangles (if any)'''
+	if count:
+		FreeCAD.Console.PrintWarning("mergeCoplanar: %s coplanar groups have an open boundary, "
+									"keeping their triangles\n" % (count,))
+
+def polygonWire(points, loop):
+	'''Makes a closed polygon wire through the points of a loop'''
+	vectors = [FreeCAD.Vector(*p) for p in points[loop].tolist()]
+	vectors.append(vectors[0])
+	return Part.makePolygon(vectors)
+
+def polygonFaces(points, polygons):
+	'''Makes an OCC face for each (outer loop, [hole loops]) polygon'''
+	faces = []
+	for outer, holes in polygons:
+		if holes:
+			faces.append(Part.Face([polygonWire(points, outer)] + [polygonWire(points, hole) for hole in holes]))
+		else:
+			faces.append(Part.Face(polygonWire(points, outer)))
+	return faces
+
+def meshToSolid(points, faces, angleTolerance=1e-4, distanceTolerance=1e-5, sewTolerance=1e-6):
+	'''Makes a solid from a welded triangle mesh, merging coplanar triangles first'''
+	polygons, openGroups = mergeCoplanar(points, faces, angleTolerance, distanceTolerance)
+	reportOpenGroups(openGroups)
+	occFaces = polygonFaces(points, polygons)
+	shell = Part.makeShell(occFaces)
+	shell.sewShape(sewTolerance)
+	return Part.makeSolid(shell)
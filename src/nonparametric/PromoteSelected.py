@@ -26,12 +26,22 @@ one you selected).  If you select 2 faces it will create two shapes with 1 face.
 '''
 
 
-import FreeCADGui as Gui, FreeCAD, Part, math
+import FreeCADGui as Gui, FreeCAD, Part
+from utility import MacroProfiler
 
 printfc = FreeCAD.Console.PrintMessage
 
+def run():
+    '''Runs the macro on the current selection'''
+    with MacroProfiler.start('PromoteSelected') as prof:
+        with prof.phase('selection'):
+            selection = Gui.Selection.getSelectionEx()
 
-for sel in Gui.Selection.getSelectionEx():
-    for so in sel.SubObjects:
-        Part.show(so)
+        with prof.phase('show'):
+            for sel in selection:
+                for so in sel.SubObjects:
+                    prof.count('subObjects')
+                    Part.show(so)
 
+if __name__ == '__main__':
+    run()
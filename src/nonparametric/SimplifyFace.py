@@ -26,6 +26,9 @@ NOTE: sometimes FreeCAD will not select the correct wire when asking for the
 outside wire so you may need to edit the selection code near the end of this 
 macro. 
 
+The cavities are removed in a worker thread (with a progress dialog and cancel
+button) so FreeCAD stays responsive on faces with thousands of vertexes.
+
 e.g. with ............ produces
 X----X   X----X     X-------------X
 |    |   |    |  >  |             |
@@ -34,7 +37,8 @@ X-------------X     X-------------X
 '''
 
 import math
-import FreeCADGui as Gui, FreeCAD
+import FreeCADGui as Gui, FreeCAD, Part
+from utility import MacroProfiler, BackgroundTask
 
 printfc = FreeCAD.Console.PrintMessage
 
@@ -56,14 +60,14 @@ class ListWrappingGenerator (object):
 		if idx < 0:
 			idx += le
 		idx = idx % le
-		for i in xrange(idx, le):
+		for i in range(idx, le):
 			yield l[i]
-		for i in xrange(0, idx):
+		for i in range(0, idx):
 			yield l[i]
 		i+=1
 		repeated = 0
 		while repeated < repeat:
-			for i in xrange(i, le):
+			for i in range(i, le):
 				repeated+=1
 				yield l[i]
 				if repeated >= repeat:
@@ -77,19 +81,19 @@ class ListWrappingGenerator (object):
 		if length == -1:
 			length = le
 		c = 0
-		for i in xrange(idx, le):
+		for i in range(idx, le):
 			c += 1
 			if c > length:
 				return
 			yield l[i]
-		for i in xrange(0, idx):
+		for i in range(0, idx):
 			c += 1
 			if c > length:
 				return
 			yield l[i]
 		i+=1
 		while c <= length:
-			for i in xrange(i, le):
+			for i in range(i, le):
 				c+=1
 				if c > length:
 					return
@@ -108,19 +112,27 @@ def getAngle3Point(a,b,c):
 	
 	return angle
 
+def wireEdgeTuples(wire):
+	'''Gets the edges of a wire as 2-tuples of vertex 3-tuples'''
+	result = []
+	for edge in wire.Edges:
+		v1 = edge.Vertexes[0]
+		v2 = edge.Vertexes[1]
+		result.append(((v1.X, v1.Y, v1.Z), (v2.X, v2.Y, v2.Z)))
+	return result
+
 def sortVertexes(wire):
 	'''Sorts the Vertices in a wire.  Returns a list of 3-tuples representing 
 	the 3D coordinates of Vertices.'''
-	edges = wire.Edges
+	return sortEdgeTuples(wireEdgeTuples(wire))
+
+def sortEdgeTuples(edges):
+	'''Sorts the Vertices of edges given as 2-tuples of vertex 3-tuples (@see:
+	wireEdgeTuples).  Returns a list of 3-tuples.'''
 	vertexConnections = {}
 	
 	# format the edges
-	for edge in edges:
-		v1 = edge.Vertexes[0]
-		v2 = edge.Vertexes[1]
-		t1 = (v1.X, v1.Y, v1.Z)
-		t2 = (v2.X, v2.Y, v2.Z)
-		
+	for t1, t2 in edges:
 		if t1 in vertexConnections:
 			vertexConnections[t1].append(t2)
 		else:
@@ -131,7 +143,7 @@ def sortVertexes(wire):
 			vertexConnections[t2] = [t1]
 	
 	# traverse edges
-	cv = vertexConnections.keys()[0]
+	cv = next(iter(vertexConnections))
 	result = [cv]
 	visited = set([])
 	while True:
@@ -164,8 +176,11 @@ def makeFaceFromVectors(vectors):
 	w = Part.makePolygon(copy)
 	return Part.Face(w)
 
-def removeCavities(vertlist):
+def removeCavities(vertlist, progress=BackgroundTask.noProgress):
 	'''Skips any inward protrusions in the vertlist.  Expects a list of 3-tuples.
+	progress is called with (done, total) vertexes as it goes.  Returns a 2-tuple of
+	(list of 3-tuples, whether the path closed back on its first vertex); pass
+	the latter to reportStart (from the GUI thread).
 	
 	e.g. with ............ produces
 	X----X   X----X     X-------------X
@@ -196,6 +211,8 @@ def removeCavities(vertlist):
 	idx = 0
 	bestVerts = {}
 	for vert in listGenerator.listAt(0,1):
+		if idx % 64 == 0:
+			progress(idx, len(vertlist2d))
 		if lastVert:
 			bestAngle = 0
 			bestVert = None
@@ -219,23 +236,53 @@ def removeCavities(vertlist):
 		consumed.add(currentVert)
 		currentVert = bestVerts[currentVert]
 	
-	if currentVert != result[0]:
+	# TODO: if not closed pop from front until we get to currentVert
+	return result, currentVert == result[0]
+
+def reportStart(closed):
+	'''Prints an error if removeCavities didn't close on its starting point'''
+	if not closed:
 		FreeCAD.Console.PrintMessage("Error: incorrect starting point\n");
-		# TODO: pop from front until we get to currentVert
-	
-	return result
 		
-# get face selection
-face = Gui.Selection.getSelectionEx()[0].SubObjects[0]
-### If this fails to select correct wire do it manually (example below). ###
-wire = face.OuterWire
-# wire = face.Wires[0]
-
-# simplify face
-sortedVertexes = sortVertexes(wire)
-trimmedVertexes = removeCavities(sortedVertexes)
-
-# make a face
-face = makeFaceFromVectors(Vectorise(trimmedVertexes))
-# printfc(face)
-Part.show(face)
+
+def simplifyVertexes(edges, progress=BackgroundTask.noProgress):
+	'''Sorts the edges (2-tuples of vertex 3-tuples) of an outside wire and removes
+	its cavities.  @see: removeCavities for the result'''
+	return removeCavities(sortEdgeTuples(edges), progress)
+
+def simplifyFace(face):
+	'''Makes a new face from the outside wire of face without its cavities'''
+	vertexes, closed = removeCavities(sortVertexes(face.OuterWire))
+	reportStart(closed)
+	return makeFaceFromVectors(Vectorise(vertexes))
+
+def run():
+	'''Runs the macro on the current selection'''
+	with MacroProfiler.start('SimplifyFace') as prof:
+		# get face selection
+		with prof.phase('selection'):
+			face = Gui.Selection.getSelectionEx()[0].SubObjects[0]
+			### If this fails to select correct wire do it manually (example below). ###
+			wire = face.OuterWire
+			# wire = face.Wires[0]
+			edges = wireEdgeTuples(wire)
+		prof.count('edges', len(edges))
+
+		# simplify face (in a worker thread)
+		with prof.phase('geometry'):
+			try:
+				trimmedVertexes, closed = BackgroundTask.run('Simplifying face', simplifyVertexes, (edges,), len(edges), 'edges')
+			except BackgroundTask.Cancelled:
+				return
+		prof.count('vertexes', len(trimmedVertexes))
+
+		# make a face
+		with prof.phase('occ'):
+			reportStart(closed)
+			face = makeFaceFromVectors(Vectorise(trimmedVertexes))
+		# printfc(face)
+		with prof.phase('show'):
+			Part.show(face)
+
+if __name__ == '__main__':
+	run()
@@ -0,0 +1,144 @@
+######################################################################################
+#    This file is part of the FreeCAD Macro Suite                                    #
+#                                                                                    #
+#    Copyright (C) 2013 Andrew Robinson (andrewjrobinson@gmail.com)                  #
+#                                                                                    #
+#    This library is free software; you can redistribute it and/or                   #
+#    modify it under the terms of the GNU Lesser General Public                      #
+#    License as published by the Free Software Foundation; either                    #
+#    version 2.1 of the License, or (at your option) any later version.              #
+#                                                                                    #
+#    This library is distributed in the hope that it will be useful,                 #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of                  #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU               #
+#    Lesser General Public License for more details.                                 #
+#                                                                                    #
+#    You should have received a copy of the GNU Lesser General Public                #
+#    License along with this library; if not, write to the Free Software             #
+#    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA  #
+######################################################################################
+
+'''
+Shared parts of the parametric (FeaturePython) versions of the macros.  Not a macro
+itself.
+
+A feature keeps its last few results in memory keyed by a geometry hash of its
+inputs (curve and surface parameters as well as end points, so e.g. changing only
+an arc's radius is a new key).  FreeCAD recomputes a feature whenever anything it links to is recomputed,
+but the work is only redone when the inputs' geometry actually changed (undoing an
+edit also hits the cache).  Caches are not saved with the document; the first
+recompute after opening it rebuilds them.
+'''
+
+import hashlib
+from collections import OrderedDict
+import FreeCAD
+from utility import MacroProfiler
+
+# digits coordinates are rounded to before hashing
+keyDigits = 7
+
+# number of results kept per feature
+cacheSize = 4
+
+# curve and surface properties (and methods) hashed with a shape; the ones a
+# geometry type doesn't have are skipped
+keyAttributes = ('Center', 'Axis', 'Radius', 'MajorRadius', 'MinorRadius', 'Location', 'Direction', 'Position', 'Degree')
+keyMethods = ('getPoles', 'getKnots', 'getWeights')
+
+
+def _rounded(value):
+	'''Rounds a number, vector or (nested) list of them for hashing'''
+	if isinstance(value, float):
+		return round(value, keyDigits)
+	if isinstance(value, (list, tuple)):
+		return tuple([_rounded(v) for v in value])
+	if hasattr(value, 'x'):
+		return (round(value.x, keyDigits), round(value.y, keyDigits), round(value.z, keyDigits))
+	return value
+
+def geometryKey(geometry):
+	'''Gets the type and defining parameters of a curve or surface'''
+	params = [type(geometry).__name__]
+	for name in keyAttributes:
+		value = getattr(geometry, name, None)
+		if value is not None:
+			params.append((name, _rounded(value)))
+	for name in keyMethods:
+		method = getattr(geometry, name, None)
+		if method is not None:
+			params.append((name, _rounded(method())))
+	return params
+
+def shapeKey(shape):
+	'''Makes a hash of the geometry of a shape: its faces' surfaces and normals and
+	its edges' curves (type and parameters e.g. radius or poles), lengths and end
+	points'''
+	h = hashlib.sha1()
+	for face in shape.Faces:
+		surface = getattr(face, 'Surface', None)
+		params = geometryKey(surface) if surface is not None else []
+		h.update(repr(('face', params, _rounded(face.normalAt(0, 0)))).encode('utf-8'))
+	for edge in shape.Edges:
+		coords = [(round(v.X, keyDigits), round(v.Y, keyDigits), round(v.Z, keyDigits)) for v in edge.Vertexes]
+		h.update(repr((geometryKey(edge.Curve), round(edge.Length, keyDigits), coords)).encode('utf-8'))
+	return h.hexdigest()
+
+def combineKeys(*keys):
+	'''Combines several keys into one'''
+	return hashlib.sha1('|'.join(keys).encode('utf-8')).hexdigest()
+
+def makeFeature(name, proxyClass):
+	'''Adds a Part::FeaturePython object to the active document with a new proxyClass
+	as its proxy'''
+	obj = FreeCAD.ActiveDocument.addObject("Part::FeaturePython", name)
+	proxyClass(obj)
+	if FreeCAD.GuiUp:
+		obj.ViewObject.Proxy = 0
+	return obj
+
+
+class CachedFeature (object):
+	'''Base of the feature proxies.  Subclasses add their properties before calling
+	__init__ and implement inputKey(obj) and compute(obj) (which returns the shape).'''
+
+	def __init__(self, obj):
+		obj.Proxy = self
+		self.Type = self.__class__.__name__
+
+	def results(self):
+		'''Gets the (in-memory) result cache: {input key: shape}'''
+		if '_results' not in self.__dict__:
+			self._results = OrderedDict()
+		return self._results
+
+	def execute(self, obj):
+		with MacroProfiler.start('%s.execute' % (self.Type,)) as prof:
+			with prof.phase('key'):
+				key = self.inputKey(obj)
+			results = self.results()
+			if key in results:
+				shape = results.pop(key)
+				prof.count('cacheHits')
+			else:
+				with prof.phase('compute'):
+					shape = self.compute(obj)
+				while len(results) >= cacheSize:
+					results.popitem(last=False)
+			results[key] = shape
+			obj.Shape = shape
+
+	def onChanged(self, obj, prop):
+		pass
+
+	def __getstate__(self):
+		return {'Type': self.Type}
+
+	def __setstate__(self, state):
+		if state:
+			self.Type = state.get('Type')
+
+	# FreeCAD 0.21+ names
+	dumps = __getstate__
+	loads = __setstate__
+## End CachedFeature Class ##
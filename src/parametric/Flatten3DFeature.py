@@ -0,0 +1,139 @@
+######################################################################################
+#    This file is part of the FreeCAD Macro Suite                                    #
+#                                                                                    #
+#    Copyright (C) 2013 Andrew Robinson (andrewjrobinson@gmail.com)                  #
+#                                                                                    #
+#    This library is free software; you can redistribute it and/or                   #
+#    modify it under the terms of the GNU Lesser General Public                      #
+#    License as published by the Free Software Foundation; either                    #
+#    version 2.1 of the License, or (at your option) any later version.              #
+#                                                                                    #
+#    This library is distributed in the hope that it will be useful,                 #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of                  #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU               #
+#    Lesser General Public License for more details.                                 #
+#                                                                                    #
+#    You should have received a copy of the GNU Lesser General Public                #
+#    License along with this library; if not, write to the Free Software             #
+#    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA  #
+######################################################################################
+
+'''
+Parametric version of flatten3D: makes a feature holding a flattened net of faces
+(a compound of the reference face and every unfolded face).
+
+Select the faces like flatten3D (reference face, bend edge, face, bend edge, face
+...).  The net is a tree: Parents gives, for each unfolded face, the index (in
+Faces) of the face it is unfolded onto (by default the previous face, i.e. a
+chain) so branches can be added by editing the Faces, BendEdges and Parents
+properties.
+
+Each unfolded face is cached under a key made from its face, its bend edge and its
+parent's key.  On recompute only the faces whose key changed, i.e. the branch below
+a changed face, are unfolded again.
+
+@see: flatten3D.py, FeatureCache.py
+'''
+
+import FreeCADGui as Gui, FreeCAD, Part
+from utility import MacroProfiler
+from D2p5.flatten3D import calculateBend, notNear
+from parametric.FeatureCache import CachedFeature, shapeKey, combineKeys, makeFeature
+
+
+def unfold(parentFace, bendEdge, face, parentRotations):
+	'''Rotates (a copy of) face around bendEdge into the plane of parentFace and then
+	by the rotations that flatten the parent.  Returns a 2-tuple of (rotations that
+	flatten face, flattened face).'''
+	base, axis, angle, expectedNormal = calculateBend(parentFace, bendEdge, face)
+	flat = face.copy()
+	flat.rotate(base, axis, angle)
+	if notNear(expectedNormal, flat.normalAt(0,0)):
+		flat.rotate(base, axis, angle*-2)
+		angle = -angle
+	for rotation in parentRotations:
+		flat.rotate(*rotation)
+	return [(base, axis, angle)] + parentRotations, flat
+
+
+class FlattenedNet (CachedFeature):
+	'''Faces of Base unfolded (around BendEdges) into the plane of the first face'''
+
+	def __init__(self, obj):
+		obj.addProperty("App::PropertyLink", "Base", "Flatten3D", "The shape the faces are on")
+		obj.addProperty("App::PropertyStringList", "Faces", "Flatten3D", "The reference face followed by the faces to unfold")
+		obj.addProperty("App::PropertyStringList", "BendEdges", "Flatten3D", "The bend edge of each unfolded face")
+		obj.addProperty("App::PropertyIntegerList", "Parents", "Flatten3D",
+						"Index (in Faces) of the face each unfolded face is unfolded onto (empty: the previous face)")
+		CachedFeature.__init__(self, obj)
+
+	def nodes(self):
+		'''Gets the (in-memory) unfolded face cache: {key: (rotations, flattened face)}'''
+		if '_nodes' not in self.__dict__:
+			self._nodes = {}
+		return self._nodes
+
+	def execute(self, obj):
+		with MacroProfiler.start('FlattenedNet.execute') as prof:
+			shape = obj.Base.Shape
+			faces = [shape.getElement(name) for name in obj.Faces]
+			edges = [shape.getElement(name) for name in obj.BendEdges]
+			parents = list(obj.Parents) or list(range(len(faces) - 1))
+			if len(edges) != len(faces) - 1 or len(parents) != len(faces) - 1:
+				raise ValueError("%s: need one bend edge and parent per unfolded face" % (obj.Name,))
+
+			nodes = self.nodes()
+			used = {}
+			keys = [shapeKey(faces[0])]
+			rotations = [[]]
+			flatFaces = [faces[0]]
+			for i in range(1, len(faces)):
+				parent = parents[i - 1]
+				if not 0 <= parent < i:
+					raise ValueError("%s: face %s must be unfolded onto an earlier face" % (obj.Name, i))
+				with prof.phase('key'):
+					key = combineKeys(keys[parent], shapeKey(faces[i]), shapeKey(edges[i - 1]))
+				if key in nodes:
+					node = nodes[key]
+					prof.count('cacheHits')
+				else:
+					with prof.phase('unfold'):
+						node = unfold(faces[parent], edges[i - 1], faces[i], rotations[parent])
+					prof.count('unfolded')
+				used[key] = node
+				keys.append(key)
+				rotations.append(node[0])
+				flatFaces.append(node[1])
+
+			# forget faces that are no longer part of the net
+			self._nodes = used
+			with prof.phase('occ'):
+				obj.Shape = Part.makeCompound(flatFaces)
+## End FlattenedNet Class ##
+
+
+def makeFlattenedNet(base, faceNames, edgeNames, parents=None):
+	'''Makes a FlattenedNet feature.  faceNames starts with the reference face.'''
+	obj = makeFeature('FlattenedNet', FlattenedNet)
+	obj.Base = base
+	obj.Faces = faceNames
+	obj.BendEdges = edgeNames
+	obj.Parents = parents or []
+	return obj
+
+def run():
+	'''Runs the macro on the current selection'''
+	with MacroProfiler.start('Flatten3DFeature') as prof:
+		with prof.phase('selection'):
+			sel = Gui.Selection.getSelectionEx()
+			sel.reverse()
+			names = []
+			for s in sel:
+				names.extend(s.SubElementNames)
+		prof.count('subObjects', len(names))
+		with prof.phase('recompute'):
+			makeFlattenedNet(sel[0].Object, names[0::2], names[1::2])
+			FreeCAD.ActiveDocument.recompute()
+
+if __name__ == '__main__':
+	run()
@@ -0,0 +1,70 @@
+######################################################################################
+#    This file is part of the FreeCAD Macro Suite                                    #
+#                                                                                    #
+#    Copyright (C) 2013 Andrew Robinson (andrewjrobinson@gmail.com)                  #
+#                                                                                    #
+#    This library is free software; you can redistribute it and/or                   #
+#    modify it under the terms of the GNU Lesser General Public                      #
+#    License as published by the Free Software Foundation; either                    #
+#    version 2.1 of the License, or (at your option) any later version.              #
+#                                                                                    #
+#    This library is distributed in the hope that it will be useful,                 #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of                  #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU               #
+#    Lesser General Public License for more details.                                 #
+#                                                                                    #
+#    You should have received a copy of the GNU Lesser General Public                #
+#    License along with this library; if not, write to the Free Software             #
+#    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA  #
+######################################################################################
+
+'''
+Parametric version of MergeFaces: makes a feature with a single face made from the
+selected (planar) faces.  It is updated when the faces change; unchanged faces
+reuse the previous result.
+
+@see: MergeFaces.py, FeatureCache.py
+'''
+
+import FreeCADGui as Gui, FreeCAD
+from utility import MacroProfiler
+from nonparametric.MergeFaces import mergeFaces
+from parametric.FeatureCache import CachedFeature, shapeKey, combineKeys, makeFeature
+
+
+class MergedFace (CachedFeature):
+	'''A face merged from the Sources faces'''
+
+	def __init__(self, obj):
+		obj.addProperty("App::PropertyLinkList", "Sources", "MergeFaces", "The (planar) faces to merge")
+		CachedFeature.__init__(self, obj)
+
+	def inputKey(self, obj):
+		return combineKeys(*[shapeKey(source.Shape) for source in obj.Sources])
+
+	def compute(self, obj):
+		return mergeFaces([source.Shape for source in obj.Sources])
+## End MergedFace Class ##
+
+
+def makeMergedFace(sources):
+	'''Makes a MergedFace feature from the sources (and hides them)'''
+	obj = makeFeature('MergedFace', MergedFace)
+	obj.Sources = sources
+	if FreeCAD.GuiUp:
+		for source in sources:
+			source.ViewObject.hide()
+	return obj
+
+def run():
+	'''Runs the macro on the current selection'''
+	with MacroProfiler.start('MergeFacesFeature') as prof:
+		with prof.phase('selection'):
+			sources = Gui.Selection.getSelection()
+		prof.count('faces', len(sources))
+		with prof.phase('recompute'):
+			makeMergedFace(sources)
+			FreeCAD.ActiveDocument.recompute()
+
+if __name__ == '__main__':
+	run()
@@ -0,0 +1,74 @@
+######################################################################################
+#    This file is part of the FreeCAD Macro Suite                                    #
+#                                                                                    #
+#    Copyright (C) 2013 Andrew Robinson (andrewjrobinson@gmail.com)                  #
+#                                                                                    #
+#    This library is free software; you can redistribute it and/or                   #
+#    modify it under the terms of the GNU Lesser General Public                      #
+#    License as published by the Free Software Foundation; either                    #
+#    version 2.1 of the License, or (at your option) any later version.              #
+#                                                                                    #
+#    This library is distributed in the hope that it will be useful,                 #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of                  #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU               #
+#    Lesser General Public License for more details.                                 #
+#                                                                                    #
+#    You should have received a copy of the GNU Lesser General Public                #
+#    License along with this library; if not, write to the Free Software             #
+#    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA  #
+######################################################################################
+
+'''
+Parametric version of SimplifyFace: makes a feature with the selected face minus the
+cavities (inlets) in its outside wire.  It is updated when the face changes; if the
+face is unchanged the previous result is reused.
+
+@see: SimplifyFace.py, FeatureCache.py
+'''
+
+import FreeCADGui as Gui, FreeCAD
+from utility import MacroProfiler
+from nonparametric.SimplifyFace import simplifyFace
+from parametric.FeatureCache import CachedFeature, shapeKey, makeFeature
+
+
+def sourceFace(obj):
+	'''Gets the face the feature simplifies'''
+	base, subNames = obj.Source
+	if subNames:
+		return base.Shape.getElement(subNames[0])
+	return base.Shape.Faces[0]
+
+
+class SimplifiedFace (CachedFeature):
+	'''The Source face without cavities'''
+
+	def __init__(self, obj):
+		obj.addProperty("App::PropertyLinkSub", "Source", "SimplifyFace", "The face to simplify")
+		CachedFeature.__init__(self, obj)
+
+	def inputKey(self, obj):
+		return shapeKey(sourceFace(obj))
+
+	def compute(self, obj):
+		return simplifyFace(sourceFace(obj))
+## End SimplifiedFace Class ##
+
+
+def makeSimplifiedFace(base, faceName):
+	'''Makes a SimplifiedFace feature of the named face of base'''
+	obj = makeFeature('SimplifiedFace', SimplifiedFace)
+	obj.Source = (base, [faceName])
+	return obj
+
+def run():
+	'''Runs the macro on the current selection'''
+	with MacroProfiler.start('SimplifyFaceFeature') as prof:
+		with prof.phase('selection'):
+			sel = Gui.Selection.getSelectionEx()[0]
+		with prof.phase('recompute'):
+			makeSimplifiedFace(sel.Object, sel.SubElementNames[0])
+			FreeCAD.ActiveDocument.recompute()
+
+if __name__ == '__main__':
+	run()
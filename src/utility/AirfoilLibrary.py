@@ -0,0 +1,229 @@
+######################################################################################
+#    This file is part of the FreeCAD Macro Suite                                    #
+#                                                                                    #
+#    Copyright (C) 2013 Andrew Robinson (andrewjrobinson@gmail.com)                  #
+#                                                                                    #
+#    This library is free software; you can redistribute it and/or                   #
+#    modify it under the terms of the GNU Lesser General Public                      #
+#    License as published by the Free Software Foundation; either                    #
+#    version 2.1 of the License, or (at your option) any later version.              #
+#                                                                                    #
+#    This library is distributed in the hope that it will be useful,                 #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of                  #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU               #
+#    Lesser General Public License for more details.                                 #
+#                                                                                    #
+#    You should have received a copy of the GNU Lesser General Public                #
+#    License along with this library; if not, write to the Free Software             #
+#    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA  #
+######################################################################################
+
+'''
+Reads airfoil profiles (.dat files) into NumPy arrays.  Not a macro itself; it is
+used by ImportWing.py.
+
+Both common .dat layouts are understood:
+.. Selig: a name line followed by x y pairs running from the trailing edge, over
+the upper surface to the leading edge and back along the lower surface.
+.. Lednicer: a name line, a line with the upper and lower point counts, then the
+upper and lower surfaces (each from leading to trailing edge).
+
+Profiles are always returned in Selig order as an (N, 2) float array.  Parsed
+profiles are kept in memory and in a small binary cache on disk (one .npz file per
+.dat file, invalidated when the .dat file's modification time changes) so a
+library of hundreds of profiles is only ever parsed once.
+
+e.g.
+lib = AirfoilLibrary('/home/me/airfoils')
+points = scaleProfile(lib.get('e214').points, 260)
+'''
+
+import os, hashlib
+import numpy
+
+# default location for the on-disk cache (None disables it)
+defaultCacheDir = os.path.join(os.path.expanduser('~'), '.cache', 'FreeCAD-Macro-Suite', 'airfoils')
+
+# bump when the cache file layout changes
+CACHE_VERSION = 1
+
+# parsed profiles by absolute path: {path: (mtime, Airfoil)}
+_loaded = {}
+
+
+class Airfoil (object):
+	'''A parsed airfoil profile'''
+
+	def __init__(self, name, points, path=None):
+		self.name = name
+		self.points = points
+		self.path = path
+		self._resampled = {}
+
+	def bounds(self):
+		'''Returns ((minx, miny), (maxx, maxy)) of the profile'''
+		return self.points.min(axis=0), self.points.max(axis=0)
+
+	def resampled(self, count):
+		'''Gets the profile resampled to count points per surface (remembered for
+		later calls).  @see: resampleProfile'''
+		if count not in self._resampled:
+			self._resampled[count] = resampleProfile(self.points, count)
+		return self._resampled[count]
+
+	def __repr__(self):
+		return "Airfoil(%r, %s points)" % (self.name, len(self.points))
+## End Airfoil Class ##
+
+
+def parseDat(lines):
+	'''Parses the lines of a Selig or Lednicer .dat file.  Returns a 2-tuple of
+	(name, points) where points is an (N, 2) array in Selig order.'''
+	lines = iter(lines)
+	name = next(lines).strip()
+	data = numpy.loadtxt(lines, usecols=(0, 1), ndmin=2)
+	if len(data) == 0:
+		raise ValueError("No points found in profile '%s'" % (name,))
+
+	# Lednicer files start with the point counts (which can't be coordinates)
+	if data[0, 0] > 1.5 and data[0, 1] > 1.5:
+		upperCount = int(data[0, 0])
+		lowerCount = int(data[0, 1])
+		upper = data[1:1 + upperCount]
+		lower = data[1 + upperCount:1 + upperCount + lowerCount]
+		if len(upper) != upperCount or len(lower) != lowerCount:
+			raise ValueError("Profile '%s' has fewer points than its header says" % (name,))
+		# both surfaces start at the leading edge; don't repeat it
+		if numpy.array_equal(upper[0], lower[0]):
+			lower = lower[1:]
+		data = numpy.concatenate((upper[::-1], lower))
+
+	return name, numpy.ascontiguousarray(data, dtype=float)
+
+def _cachePath(path, cacheDir):
+	'''Gets the cache file used for the .dat file at path'''
+	key = hashlib.sha1(path.encode('utf-8')).hexdigest()
+	return os.path.join(cacheDir, key + '.npz')
+
+def _readCache(path, mtime, cacheDir):
+	'''Reads a profile from the disk cache.  Returns None if missing or stale.'''
+	cacheFile = _cachePath(path, cacheDir)
+	try:
+		with numpy.load(cacheFile) as cached:
+			if int(cached['version']) != CACHE_VERSION or float(cached['mtime']) != mtime \
+					or str(cached['path']) != path:
+				return None
+			return Airfoil(str(cached['name']), cached['points'], path)
+	except (IOError, OSError, KeyError, ValueError):
+		return None
+
+def _writeCache(airfoil, mtime, cacheDir):
+	'''Writes a profile to the disk cache (failures are ignored)'''
+	try:
+		if not os.path.isdir(cacheDir):
+			os.makedirs(cacheDir)
+		cacheFile = _cachePath(airfoil.path, cacheDir)
+		tmpFile = cacheFile + '.tmp'
+		with open(tmpFile, 'wb') as f:
+			numpy.savez(f, version=CACHE_VERSION, mtime=mtime, path=airfoil.path,
+					name=airfoil.name, points=airfoil.points)
+		os.rename(tmpFile, cacheFile)
+	except (IOError, OSError):
+		pass
+
+def loadProfile(path, cacheDir=defaultCacheDir):
+	'''Loads the profile in the .dat file at path.  Uses the in-memory and disk
+	caches when the file hasn't changed since it was last parsed.'''
+	path = os.path.abspath(path)
+	mtime = os.path.getmtime(path)
+
+	# memory cache
+	if path in _loaded and _loaded[path][0] == mtime:
+		return _loaded[path][1]
+
+	# disk cache
+	airfoil = None
+	if cacheDir:
+		airfoil = _readCache(path, mtime, cacheDir)
+
+	# parse
+	if airfoil is None:
+		with open(path) as f:
+			name, points = parseDat(f)
+		airfoil = Airfoil(name, points, path)
+		if cacheDir:
+			_writeCache(airfoil, mtime, cacheDir)
+
+	_loaded[path] = (mtime, airfoil)
+	return airfoil
+
+def scaleProfile(points, chord, thicknessScale=1.0):
+	'''Scales the profile points to the given chord length with its minimum corner
+	on the origin.  thicknessScale stretches (or squashes) the profile vertically.'''
+	mins = points.min(axis=0)
+	maxs = points.max(axis=0)
+	factor = chord / (maxs[0] - mins[0])
+	return (points - mins) * (factor, factor * thicknessScale)
+
+def resampleProfile(points, count):
+	'''Resamples a Selig ordered profile to a unit chord (leading edge on the
+	origin) with count cosine spaced points per surface.  All resampled profiles
+	share the same chord stations so they can be blended point by point.  Returns
+	a (2 * count - 1, 2) array in Selig order.'''
+	le = int(numpy.argmin(points[:, 0]))
+	leading = points[le]
+	chord = points[:, 0].max() - leading[0]
+	unit = (points - leading) / chord
+
+	# both surfaces from leading to trailing edge (forced monotonic for interp)
+	upper = unit[le::-1]
+	lower = unit[le:]
+	stations = 0.5 * (1.0 - numpy.cos(numpy.linspace(0.0, numpy.pi, count)))
+	upperY = numpy.interp(stations, numpy.maximum.accumulate(upper[:, 0]), upper[:, 1])
+	lowerY = numpy.interp(stations, numpy.maximum.accumulate(lower[:, 0]), lower[:, 1])
+
+	x = numpy.concatenate((stations[::-1], stations[1:]))
+	y = numpy.concatenate((upperY[::-1], lowerY[1:]))
+	return numpy.column_stack((x, y))
+
+
+class AirfoilLibrary (object):
+	'''A directory of .dat files that can be looked up by profile name (the file
+	name without extension, case-insensitive).  Files are only parsed when first
+	requested.'''
+
+	def __init__(self, directory, cacheDir=defaultCacheDir):
+		self.directory = directory
+		self.cacheDir = cacheDir
+		self.paths = {}
+		self.refresh()
+
+	def refresh(self):
+		'''Re-scans the directory for .dat files'''
+		self.paths = {}
+		for filename in os.listdir(self.directory):
+			stem, ext = os.path.splitext(filename)
+			if ext.lower() == '.dat':
+				self.paths[stem.lower()] = os.path.join(self.directory, filename)
+
+	def names(self):
+		'''Gets a sorted list of available profile names'''
+		return sorted(self.paths.keys())
+
+	def _key(self, name):
+		'''Gets the lookup key for a profile name (lower case, without .dat)'''
+		key = name.lower()
+		if key.endswith('.dat'):
+			key = key[:-4]
+		return key
+
+	def get(self, name):
+		'''Gets the Airfoil with the given name'''
+		key = self._key(name)
+		if key not in self.paths:
+			raise KeyError("No profile named '%s' in %s" % (name, self.directory))
+		return loadProfile(self.paths[key], self.cacheDir)
+
+	def __contains__(self, name):
+		return self._key(name) in self.paths
+## End AirfoilLibrary Class ##
@@ -0,0 +1,160 @@
+######################################################################################
+#    This file is part of the FreeCAD Macro Suite                                    #
+#                                                                                    #
+#    Copyright (C) 2013 Andrew Robinson (andrewjrobinson@gmail.com)                  #
+#                                                                                    #
+#    This library is free software; you can redistribute it and/or                   #
+#    modify it under the terms of the GNU Lesser General Public                      #
+#    License as published by the Free Software Foundation; either                    #
+#    version 2.1 of the License, or (at your option) any later version.              #
+#                                                                                    #
+#    This library is distributed in the hope that it will be useful,                 #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of                  #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU               #
+#    Lesser General Public License for more details.                                 #
+#                                                                                    #
+#    You should have received a copy of the GNU Lesser General Public                #
+#    License along with this library; if not, write to the Free Software             #
+#    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA  #
+######################################################################################
+
+'''
+Turns (scaled, 3D) airfoil points into Part edges.  Not a macro itself; it is used by
+ImportWing.py.
+
+Two modes are available:
+.. polyline: one straight edge between each pair of points (exact but faceted, and
+slow to loft/offset when the profile has hundreds of points).
+.. bspline: a smooth B-spline is approximated through the points within a maximum
+deviation.  The profile is split at the leading edge so the leading edge point
+is kept exactly, giving one edge per surface (plus a closing edge for an open
+trailing edge).  A surface that can't be fitted within the deviation is left as
+a polyline (and counted in the FitReport).
+
+@see: AirfoilLibrary.py, to load the points
+'''
+
+import FreeCAD, Part
+import numpy
+
+# number of times the approximation tolerance is tightened to meet the requested deviation
+maxFitAttempts = 4
+
+
+class FitReport (object):
+	'''Summary of how a profile was converted to edges'''
+
+	def __init__(self, mode, edgeCount, polylineEdgeCount, maxError=0.0, tolerance=0.0, fallbackCount=0, fallbackError=0.0):
+		self.mode = mode
+		self.edgeCount = edgeCount
+		self.polylineEdgeCount = polylineEdgeCount
+		self.maxError = maxError
+		self.tolerance = tolerance
+		self.fallbackCount = fallbackCount
+		self.fallbackError = fallbackError
+
+	def __str__(self):
+		if self.mode == 'polyline':
+			return "Polyline: %s edges" % (self.edgeCount,)
+		text = "B-spline fit: %s edges (polyline: %s edges), max deviation %.5g (tolerance %.5g)" \
+				% (self.edgeCount, self.polylineEdgeCount, self.maxError, self.tolerance)
+		if self.fallbackCount:
+			text += "; %s surface(s) left as polylines (best fit deviation %.5g)" % (self.fallbackCount, self.fallbackError)
+		return text
+## End FitReport Class ##
+
+
+def removeRepeats(points):
+	'''Removes consecutive duplicate points from an (N, 3) array'''
+	keep = numpy.ones(len(points), dtype=bool)
+	keep[1:] = numpy.any(points[1:] != points[:-1], axis=1)
+	return points[keep]
+
+def leadingEdgeIndex(points):
+	'''Gets the index of the leading edge point (minimum chord coordinate) of a Selig
+	ordered (N, 3) profile.  The chord is assumed to run along the Y axis.'''
+	return int(numpy.argmin(points[:, 1]))
+
+def toVectors(points):
+	'''Converts an (N, 3) array to a list of FreeCAD Vectors'''
+	return [FreeCAD.Vector(*p) for p in points.tolist()]
+
+def polylineEdges(points):
+	'''Makes one straight edge between each consecutive pair of points'''
+	edges = []
+	lastv = None
+	for v in points.tolist():
+		vert = Part.Vertex(*v)
+		if lastv:
+			edges.append(Part.Edge(lastv, vert))
+		lastv = vert
+	return edges
+
+def fitError(curve, vectors):
+	'''Gets the maximum distance between the points and the curve'''
+	error = 0.0
+	for v in vectors:
+		error = max(error, (curve.value(curve.parameter(v)) - v).Length)
+	return error
+
+def fitBSpline(points, tolerance):
+	'''Approximates a B-spline through the (N, 3) points, passing through the first
+	and last points.  Returns a 2-tuple of (curve, maxError); maxError can still
+	be above tolerance after maxFitAttempts.'''
+	vectors = toVectors(points)
+	if len(vectors) < 3:
+		curve = Part.BSplineCurve()
+		curve.interpolate(vectors)
+		return curve, 0.0
+
+	# OCC's tolerance is not a hard limit, so tighten it until the fit is good enough
+	approxTolerance = tolerance
+	for attempt in range(maxFitAttempts):
+		curve = Part.BSplineCurve()
+		curve.approximate(Points=vectors, DegMin=3, DegMax=8, Continuity='C2', Tolerance=approxTolerance)
+		error = fitError(curve, vectors)
+		if error <= tolerance:
+			break
+		approxTolerance /= 2.0
+	return curve, error
+
+def profileEdges(points, mode='bspline', tolerance=0.01, splitAtLeadingEdge=True):
+	'''Converts Selig ordered (N, 3) profile points into edges.  Returns a 2-tuple
+	of (edges, FitReport).  An open trailing edge is closed with a straight edge.'''
+	points = removeRepeats(numpy.asarray(points, dtype=float))
+	closed = numpy.array_equal(points[0], points[-1])
+	polylineCount = len(points) - 1 + (0 if closed else 1)
+
+	if mode == 'polyline':
+		edges = polylineEdges(points)
+		report = FitReport(mode, 0, polylineCount)
+	elif mode == 'bspline':
+		if splitAtLeadingEdge:
+			le = leadingEdgeIndex(points)
+			segments = [points[:le + 1], points[le:]]
+		else:
+			segments = [points]
+		edges = []
+		maxError = 0.0
+		fallbackCount = 0
+		fallbackError = 0.0
+		for segment in segments:
+			if len(segment) < 2:
+				continue
+			curve, error = fitBSpline(segment, tolerance)
+			if error > tolerance:
+				# the fit isn't good enough; the points are exact
+				edges.extend(polylineEdges(segment))
+				fallbackCount += 1
+				fallbackError = max(fallbackError, error)
+				continue
+			edges.append(curve.toShape())
+			maxError = max(maxError, error)
+		report = FitReport(mode, 0, polylineCount, maxError, tolerance, fallbackCount, fallbackError)
+	else:
+		raise ValueError("Unknown profile mode '%s'" % (mode,))
+
+	if not closed:
+		edges.append(Part.Edge(Part.Vertex(*points[-1].tolist()), Part.Vertex(*points[0].tolist())))
+	report.edgeCount = len(edges)
+	return edges, report
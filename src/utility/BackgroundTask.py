@@ -0,0 +1,160 @@
+######################################################################################
+#    This file is part of the FreeCAD Macro Suite                                    #
+#                                                                                    #
+#    Copyright (C) 2013 Andrew Robinson (andrewjrobinson@gmail.com)                  #
+#                                                                                    #
+#    This library is free software; you can redistribute it and/or                   #
+#    modify it under the terms of the GNU Lesser General Public                      #
+#    License as published by the Free Software Foundation; either                    #
+#    version 2.1 of the License, or (at your option) any later version.              #
+#                                                                                    #
+#    This library is distributed in the hope that it will be useful,                 #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of                  #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU               #
+#    Lesser General Public License for more details.                                 #
+#                                                                                    #
+#    You should have received a copy of the GNU Lesser General Public                #
+#    License along with this library; if not, write to the Free Software             #
+#    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA  #
+######################################################################################
+
+'''
+Runs the slow, pure geometry step of a macro in a worker thread with a progress
+dialog and a cancel button, so FreeCAD stays responsive.  Not a macro itself.
+
+Long running macros are split in 3 steps:
+.. extract (GUI thread): read the selection into plain tuples/NumPy arrays
+.. compute (worker thread): the geometry, on plain data only (no FreeCAD or Part
+objects; they are not thread safe).  It is passed a progress function to call
+now and then with (done, total), which raises Cancelled once cancel is pressed.
+.. apply (GUI thread): make the shapes/document objects from the result
+
+Without the GUI (or with useThread off) compute just runs in the calling thread.
+It also does while MacroProfiler is capturing a cProfile, which only sees the
+thread that enabled it, so the compute step is in the stats.
+When it finishes the throughput (e.g. edges/s) is printed to the console.
+
+e.g.
+segments = shapeSegments(shapes)                    # extract
+try:
+    path = BackgroundTask.run('Merging faces', segmentsPath, (segments,), len(segments), 'edges')
+except BackgroundTask.Cancelled:
+    return
+Part.show(pathFace(path))                           # apply
+'''
+
+import threading, time
+import FreeCAD
+from utility import MacroProfiler
+
+## Begin Settings ##
+useThread = True        # False runs compute steps on the GUI thread (e.g. for debugging)
+pollSeconds = 0.05      # how often the dialog is updated
+showAfter = 500         # (milliseconds) the dialog only appears for longer runs
+## end settings ##
+
+clock = getattr(time, 'perf_counter', time.time)
+printfc = FreeCAD.Console.PrintMessage
+
+
+class Cancelled (Exception):
+	'''Raised (in the worker and to the caller) when the user cancels a task'''
+	pass
+## End Cancelled Class ##
+
+
+def noProgress(done, total=None):
+	'''Default progress function for compute steps run without a Task'''
+	pass
+
+
+class Progress (object):
+	'''The progress function passed to compute steps (also polled by the dialog)'''
+
+	def __init__(self, total=0):
+		self.done = 0
+		self.total = total
+		self.cancelled = False
+
+	def __call__(self, done, total=None):
+		self.done = done
+		if total is not None:
+			self.total = total
+		if self.cancelled:
+			raise Cancelled()
+
+	def cancel(self):
+		self.cancelled = True
+## End Progress Class ##
+
+
+def _guiAvailable():
+	'''Checks if a Qt progress dialog can be shown'''
+	if not getattr(FreeCAD, 'GuiUp', False):
+		return False
+	try:
+		from PySide import QtGui
+	except ImportError:
+		return False
+	return True
+
+def _runThreaded(title, compute, args, progress):
+	'''Runs compute in a worker thread while a progress dialog is shown (and Qt
+	events are processed).  Returns its result or raises what it raised.'''
+	from PySide import QtGui, QtCore
+	outcome = {}
+
+	def work():
+		try:
+			outcome['result'] = compute(*args, progress=progress)
+		except BaseException as e:
+			outcome['error'] = e
+
+	dialog = QtGui.QProgressDialog(title, "Cancel", 0, 0)
+	dialog.setWindowTitle(title)
+	dialog.setWindowModality(QtCore.Qt.ApplicationModal)
+	dialog.setMinimumDuration(showAfter)
+	worker = threading.Thread(target=work, name=title)
+	worker.daemon = True
+	worker.start()
+	try:
+		while worker.is_alive():
+			worker.join(pollSeconds)
+			if progress.total:
+				dialog.setMaximum(progress.total)
+				dialog.setValue(min(progress.done, progress.total))
+			# the dialog is only modal once it shows (after showAfter), until then
+			# keep user input (e.g. running the command again) queued
+			if dialog.isVisible():
+				QtGui.QApplication.processEvents()
+			else:
+				QtGui.QApplication.processEvents(QtCore.QEventLoop.ExcludeUserInputEvents)
+			if dialog.wasCanceled():
+				progress.cancel()
+	finally:
+		dialog.reset()
+		dialog.close()
+
+	if 'error' in outcome:
+		raise outcome['error']
+	return outcome['result']
+
+def run(title, compute, args=(), count=0, unit='items'):
+	'''Runs compute(*args, progress=...) (in a worker thread when the GUI is up and
+	cProfile isn't capturing) and reports count units/s when done.  Returns its result.  Raises Cancelled if
+	the user cancelled.'''
+	progress = Progress(count)
+	profiling = MacroProfiler.isEnabled() and MacroProfiler.cProfileEnabled()
+	start = clock()
+	try:
+		if useThread and not profiling and _guiAvailable():
+			result = _runThreaded(title, compute, args, progress)
+		else:
+			result = compute(*args, progress=progress)
+	except Cancelled:
+		printfc("%s: cancelled\n" % (title,))
+		raise
+	elapsed = clock() - start
+	if count:
+		printfc("%s: %s %s in %.3fs (%.0f %s/s)\n" % (title, count, unit, elapsed, count / max(elapsed, 1e-9), unit))
+	return result
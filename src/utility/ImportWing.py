@@ -22,61 +22,62 @@
 Makes an airfoil profile (.dat file) into a face.
 
 This is a method that work's around some problems my pivy/coin installation has.
+
+Profiles are looked up by name in a directory of Selig or Lednicer .dat files.
+The profile can be made from one straight edge per point (polyline) or from a
+smooth B-spline fitted within a maximum deviation (bspline); bspline faces are much
+faster to loft, offset and use in booleans.
+
+@see: AirfoilLibrary.py (the utility package needs to be importable, e.g. symlink
+the utility directory next to this macro)
+@see: AirfoilShape.py
 '''
 
-import FreeCADGui as Gui, FreeCAD, Part, math
-from IN import INTMAX_C, INTMAX_MIN, INTMAX_MAX
+import FreeCAD, Part
+import numpy
+from utility.AirfoilLibrary import AirfoilLibrary, scaleProfile
+from utility.AirfoilShape import profileEdges
+from utility import MacroProfiler
 
 printfc = FreeCAD.Console.PrintMessage
 
+## Begin Settings ##
 # targetLen = 340
 targetLen = 260
 Xcoord = 0
-filename = '/home/arobinson/Documents/RC Plane/E214 profile.dat'
-
+thicknessScale = 35 / (27.34 + 11.99)   # stretch applied to profile height
+libraryDir = '/home/arobinson/Documents/RC Plane'
+profileName = 'E214 profile'
+fitMode = 'bspline'     # 'bspline' or 'polyline' (one edge per point)
+fitTolerance = 0.05     # maximum distance between the B-spline and the points
+## end settings ##
 
-# extract 2D points (and save in 3D)
-f = open(filename)
-f.readline() # remove header
-points = []
-maxlen = INTMAX_MIN
-minlen = INTMAX_MAX
-minheight = INTMAX_MAX
-for line in f:
-    nums = line.split()
-    if len(nums) > 0:
-        pa = float(nums[0])
-        pb = float(nums[1])
-        points.append((pa, pb))
-        if pa > maxlen:
-            maxlen = pa
-        if pa < minlen:
-            minlen = pa
-        if pb < minheight:
-            minheight = pb
-    
-printfc("Points: %s\n"%(points,))
+def run():
+    '''Runs the macro'''
+    with MacroProfiler.start('ImportWing') as prof:
+        # load 2D points (parsed once, then cached)
+        with prof.phase('load'):
+            airfoil = AirfoilLibrary(libraryDir).get(profileName)
+        printfc("Profile: %s (%s points)\n" % (airfoil.name, len(airfoil.points)))
+        prof.count('points', len(airfoil.points))
 
-# scale and translate
-scaledpoints = []
-factor = targetLen / (maxlen - minlen)
-hfactor = factor * (35) / (27.34 + 11.99)
-for p in points:
-    scaledpoints.append((Xcoord, p[0] * factor - minlen, p[1] * hfactor - minheight))
+        # scale and translate (and save in 3D)
+        with prof.phase('geometry'):
+            scaled = scaleProfile(airfoil.points, targetLen, thicknessScale)
+            scaledpoints = numpy.column_stack((numpy.full(len(scaled), Xcoord, dtype=float), scaled))
 
-printfc("Scaled points: %s\n"%(scaledpoints,))
+        # convert to Edges
+        with prof.phase('occ'):
+            edges, report = profileEdges(scaledpoints, fitMode, fitTolerance)
 
-# convert to Edges
-edges = []
-lastv = None
-for v in scaledpoints:
-    vert = Part.Vertex(*v)
-    if lastv:
-        edges.append(Part.Edge(lastv, vert))
-    lastv = vert
+            # make face
+            wire = Part.Wire(edges)
+            face = Part.Face(wire)
+        printfc("%s\n" % (report,))
+        prof.count('edges', len(edges))
 
-# make face
-wire = Part.Wire(edges)
-face = Part.Face(wire)
-Part.show(face)
+        with prof.phase('show'):
+            Part.show(face)
 
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,234 @@
+######################################################################################
+#    This file is part of the FreeCAD Macro Suite                                    #
+#                                                                                    #
+#    Copyright (C) 2013 Andrew Robinson (andrewjrobinson@gmail.com)                  #
+#                                                                                    #
+#    This library is free software; you can redistribute it and/or                   #
+#    modify it under the terms of the GNU Lesser General Public                      #
+#    License as published by the Free Software Foundation; either                    #
+#    version 2.1 of the License, or (at your option) any later version.              #
+#                                                                                    #
+#    This library is distributed in the hope that it will be useful,                 #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of                  #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU               #
+#    Lesser General Public License for more details.                                 #
+#                                                                                    #
+#    You should have received a copy of the GNU Lesser General Public                #
+#    License along with this library; if not, write to the Free Software             #
+#    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA  #
+######################################################################################
+
+'''
+Opt-in timing instrumentation for the macros.  Not a macro itself.
+
+Each macro splits its work into named phases (e.g. selection, geometry, occ, show).
+When profiling is enabled the wall time and number of calls of every phase, along
+with any object counts the macro records, are printed to the FreeCAD console when
+the macro finishes and (optionally) appended as a JSON line to a log file so
+runs can be compared over time.  When disabled it costs next to nothing.
+
+Enable it by setting the options below or with environment variables:
+.. MACROSUITE_PROFILE=1 to time phases (MACROSUITE_PROFILE=cprofile to also capture a
+cProfile of the whole run and print the most expensive functions)
+.. MACROSUITE_PROFILE_LOG=/path/to/log.jsonl to append results to a file
+
+e.g.
+with MacroProfiler.start('MergeFaces') as prof:
+    with prof.phase('selection'):
+        faces = Gui.Selection.getSelection()
+    prof.count('faces', len(faces))
+    ...
+
+The results are reported (and cProfile turned off) when the with block exits,
+even if the macro raises an exception.
+
+Phases can also decorate functions: @prof.phase('geometry')
+'''
+
+import os, time, json
+from collections import OrderedDict
+import FreeCAD
+
+## Begin Settings ##
+enabled = False         # time phases of every macro
+useCProfile = False     # also run cProfile over the whole macro
+cProfileLines = 15      # number of functions to report from cProfile
+logFile = None          # append a JSON line per run to this file
+## end settings ##
+
+clock = getattr(time, 'perf_counter', time.time)
+
+
+def isEnabled():
+	'''Checks if profiling is turned on (by setting or environment)'''
+	return enabled or bool(os.environ.get('MACROSUITE_PROFILE'))
+
+def cProfileEnabled():
+	'''Checks if cProfile capture is turned on (by setting or environment)'''
+	return useCProfile or os.environ.get('MACROSUITE_PROFILE', '').lower() == 'cprofile'
+
+def getLogFile():
+	'''Gets the JSON lines log file (or None)'''
+	return os.environ.get('MACROSUITE_PROFILE_LOG') or logFile
+
+
+class _Phase (object):
+	'''Times a named phase.  Use as a context manager or function decorator.'''
+
+	def __init__(self, profiler, name):
+		self.profiler = profiler
+		self.name = name
+		self.start = None
+
+	def __enter__(self):
+		self.start = clock()
+		return self
+
+	def __exit__(self, excType, excValue, traceback):
+		self.profiler.addTime(self.name, clock() - self.start)
+		return False
+
+	def __call__(self, func):
+		profiler = self.profiler
+		name = self.name
+		def timed(*args, **kwargs):
+			with _Phase(profiler, name):
+				return func(*args, **kwargs)
+		timed.__name__ = func.__name__
+		timed.__doc__ = func.__doc__
+		return timed
+## End _Phase Class ##
+
+
+class Profiler (object):
+	'''Collects phase times and counts for one run of a macro'''
+
+	def __init__(self, name):
+		self.name = name
+		self.phases = OrderedDict()
+		self.counts = OrderedDict()
+		self.started = clock()
+		self.finished = False
+		self.error = None
+		self.cprofile = None
+		if cProfileEnabled():
+			import cProfile
+			self.cprofile = cProfile.Profile()
+			self.cprofile.enable()
+
+	def phase(self, name):
+		'''Gets a timer for the named phase'''
+		return _Phase(self, name)
+
+	def addTime(self, name, seconds):
+		'''Adds a call of seconds to the named phase'''
+		if name in self.phases:
+			self.phases[name][0] += seconds
+			self.phases[name][1] += 1
+		else:
+			self.phases[name] = [seconds, 1]
+
+	def count(self, name, n=1):
+		'''Adds n to the named object count'''
+		self.counts[name] = self.counts.get(name, 0) + n
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, excType, excValue, traceback):
+		if excType is not None:
+			self.error = excType.__name__
+		self.finish()
+		return False
+
+	def finish(self):
+		'''Stops timing and reports the results (only the first call does anything)'''
+		if self.finished:
+			return
+		self.finished = True
+		total = clock() - self.started
+		printfc = FreeCAD.Console.PrintMessage
+
+		if self.cprofile is not None:
+			self.cprofile.disable()
+
+		lines = ["%s: %.4fs total%s\n" % (self.name, total, " (failed: %s)" % (self.error,) if self.error else '')]
+		for name, (seconds, calls) in self.phases.items():
+			lines.append("  %-16s %10.4fs %5.1f%% %8s call%s\n"
+					% (name, seconds, 100.0 * seconds / total if total else 0.0, calls, '' if calls == 1 else 's'))
+		if self.counts:
+			lines.append("  counts: %s\n" % (', '.join(["%s=%s" % item for item in self.counts.items()]),))
+		printfc(''.join(lines))
+
+		if self.cprofile is not None:
+			import pstats
+			try:
+				from StringIO import StringIO
+			except ImportError: # python 3
+				from io import StringIO
+			out = StringIO()
+			pstats.Stats(self.cprofile, stream=out).sort_stats('cumulative').print_stats(cProfileLines)
+			printfc(out.getvalue())
+
+		path = getLogFile()
+		if path:
+			record = OrderedDict([('macro', self.name),
+								('time', time.strftime('%Y-%m-%dT%H:%M:%S')),
+								('total', total),
+								('error', self.error),
+								('phases', OrderedDict([(name, {'seconds': s, 'calls': c})
+														for name, (s, c) in self.phases.items()])),
+								('counts', self.counts)])
+			try:
+				with open(path, 'a') as f:
+					f.write(json.dumps(record) + '\n')
+			except (IOError, OSError) as e:
+				FreeCAD.Console.PrintError("Unable to write profile log %s: %s\n" % (path, e))
+## End Profiler Class ##
+
+
+class _NullPhase (object):
+	'''A phase that does nothing (profiling disabled)'''
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, excType, excValue, traceback):
+		return False
+
+	def __call__(self, func):
+		return func
+## End _NullPhase Class ##
+
+_nullPhase = _NullPhase()
+
+
+class _NullProfiler (object):
+	'''A Profiler that does nothing (profiling disabled)'''
+
+	def phase(self, name):
+		return _nullPhase
+
+	def count(self, name, n=1):
+		pass
+
+	def finish(self):
+		pass
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, excType, excValue, traceback):
+		return False
+## End _NullProfiler Class ##
+
+# shared do-nothing profiler (for library code called without one)
+nullProfiler = _NullProfiler()
+
+
+def start(name):
+	'''Starts profiling a run of the named macro.  Returns a Profiler (or a do-nothing
+	stand-in when profiling is disabled).'''
+	if isEnabled():
+		return Profiler(name)
+	return nullProfiler
@@ -0,0 +1,69 @@
+######################################################################################
+#    This file is part of the FreeCAD Macro Suite                                    #
+#                                                                                    #
+#    Copyright (C) 2013 Andrew Robinson (andrewjrobinson@gmail.com)                  #
+#                                                                                    #
+#    This library is free software; you can redistribute it and/or                   #
+#    modify it under the terms of the GNU Lesser General Public                      #
+#    License as published by the Free Software Foundation; either                    #
+#    version 2.1 of the License, or (at your option) any later version.              #
+#                                                                                    #
+#    This library is distributed in the hope that it will be useful,                 #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of                  #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU               #
+#    Lesser General Public License for more details.                                 #
+#                                                                                    #
+#    You should have received a copy of the GNU Lesser General Public                #
+#    License along with this library; if not, write to the Free Software             #
+#    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA  #
+######################################################################################
+
+'''
+Makes a lofted wing (solid) from a span table of stations.  Each station gives the
+chord, twist, sweep, dihedral and airfoil profile (.dat file name) at a distance
+along the span; profiles are blended between stations with different profiles.
+
+Edit the span table below and re-run to iterate on the planform.
+
+@see: Wing.py for the details of each span table column
+@see: ImportWing.py to import a single profile as a face
+'''
+
+import FreeCAD, Part
+from utility.AirfoilLibrary import AirfoilLibrary
+from utility.Wing import buildWing
+from utility import MacroProfiler
+
+printfc = FreeCAD.Console.PrintMessage
+
+## Begin Settings ##
+libraryDir = '/home/arobinson/Documents/RC Plane'
+
+# (station, chord, twist, sweep, dihedral, profile)
+spanTable = [(0,   260,  0.0, 0.0, 0.0, 'E214 profile'),
+             (600, 200, -1.0, 2.0, 3.0, 'E214 profile'),
+             (900, 140, -2.5, 5.0, 3.0, 'E214 profile'),
+             ]
+
+sectionsPerPanel = 0    # extra (interpolated) sections between stations
+profilePoints = 80      # points per surface after resampling the profiles
+thicknessScale = 1.0    # stretch applied to profile height
+fitMode = 'bspline'     # 'bspline' or 'polyline' (one edge per point)
+fitTolerance = 0.05     # maximum distance between the B-spline and the points
+makeSolid = True
+## end settings ##
+
+def run():
+    '''Runs the macro'''
+    with MacroProfiler.start('MakeWing') as prof:
+        library = AirfoilLibrary(libraryDir)
+        wing, sections = buildWing(library, spanTable, sectionsPerPanel, profilePoints, thicknessScale,
+                                   fitMode, fitTolerance, makeSolid, prof)
+        printfc("Wing: %s sections, %s faces\n" % (len(sections), len(wing.Faces)))
+        prof.count('sections', len(sections))
+
+        with prof.phase('show'):
+            Part.show(wing)
+
+if __name__ == '__main__':
+    run()
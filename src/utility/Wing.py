@@ -0,0 +1,154 @@
+######################################################################################
+#    This file is part of the FreeCAD Macro Suite                                    #
+#                                                                                    #
+#    Copyright (C) 2013 Andrew Robinson (andrewjrobinson@gmail.com)                  #
+#                                                                                    #
+#    This library is free software; you can redistribute it and/or                   #
+#    modify it under the terms of the GNU Lesser General Public                      #
+#    License as published by the Free Software Foundation; either                    #
+#    version 2.1 of the License, or (at your option) any later version.              #
+#                                                                                    #
+#    This library is distributed in the hope that it will be useful,                 #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of                  #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU               #
+#    Lesser General Public License for more details.                                 #
+#                                                                                    #
+#    You should have received a copy of the GNU Lesser General Public                #
+#    License along with this library; if not, write to the Free Software             #
+#    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA  #
+######################################################################################
+
+'''
+Builds a lofted wing from a span table.  Not a macro itself; it is used by
+MakeWing.py.
+
+Each row of the span table is (station, chord, twist, sweep, dihedral, profile):
+.. station: distance along the span (X axis) from the root
+.. chord: chord length at the station
+.. twist: angle (degrees, +ve is nose up) about the quarter chord
+.. sweep: leading edge sweep angle (degrees) of the panel inboard of the station
+.. dihedral: dihedral angle (degrees) of the panel inboard of the station
+.. profile: name of the profile in the AirfoilLibrary
+
+Like ImportWing the chord runs along Y (leading edge toward -Y) and thickness along Z.
+
+Profiles are resampled to a common set of chord stations so the sections between
+two stations are blended point by point in one NumPy operation.  Each distinct
+(blended) profile is fitted once at unit chord and every section using it is a
+scaled/rotated/translated copy, so the fit is shared between stations (and between
+runs while this module stays loaded).
+
+@see: AirfoilLibrary.py, AirfoilShape.py
+'''
+
+import FreeCAD, Part
+import numpy
+from utility.AirfoilShape import profileEdges
+from utility import MacroProfiler
+
+# fitted unit chord wires: {(airfoils, profilePoints, thicknessScale, fitMode, fitTolerance): (wire, report)}
+# (keyed by the Airfoil objects so a changed .dat file gets a new fit)
+_unitWires = {}
+
+
+def planform(spanTable, sectionsPerPanel=0):
+	'''Calculates the sections of a wing.  sectionsPerPanel extra sections are
+	interpolated between each pair of stations.  Returns a dict of arrays, one
+	element per section: station, chord, twist, leY, leZ (leading edge offsets),
+	lower (index of the inboard span table row) and weight (blend toward the next row).'''
+	table = numpy.array([row[:5] for row in spanTable], dtype=float)
+	if len(table) < 2:
+		raise ValueError("The span table needs at least 2 stations")
+	stations, chords, twists, sweeps, dihedrals = table.T
+	if numpy.any(numpy.diff(stations) <= 0):
+		raise ValueError("Span table stations must be strictly increasing")
+
+	# leading edge of each station (straight panels so linear between stations)
+	panelSpans = numpy.diff(stations)
+	leY = numpy.concatenate(([0.0], numpy.cumsum(panelSpans * numpy.tan(numpy.radians(sweeps[1:])))))
+	leZ = numpy.concatenate(([0.0], numpy.cumsum(panelSpans * numpy.tan(numpy.radians(dihedrals[1:])))))
+
+	# section stations
+	steps = numpy.arange(sectionsPerPanel + 1) / float(sectionsPerPanel + 1)
+	sections = (stations[:-1, None] + panelSpans[:, None] * steps).ravel()
+	sections = numpy.append(sections, stations[-1])
+
+	# row each section blends from (and how far toward the next row)
+	lower = numpy.clip(numpy.searchsorted(stations, sections, 'right') - 1, 0, len(stations) - 2)
+	weight = (sections - stations[lower]) / panelSpans[lower]
+	atNext = weight >= 1.0
+	lower = numpy.where(atNext, lower + 1, lower)
+	weight = numpy.where(atNext, 0.0, weight)
+
+	return {'station': sections,
+			'chord': numpy.interp(sections, stations, chords),
+			'twist': numpy.interp(sections, stations, twists),
+			'leY': numpy.interp(sections, stations, leY),
+			'leZ': numpy.interp(sections, stations, leZ),
+			'lower': lower,
+			'weight': weight}
+
+def sectionMatrix(station, chord, twist, leY, leZ):
+	'''Makes the Matrix that places a unit chord profile (in the YZ plane with its
+	leading edge on the origin) at a section: a uniform scale, rotation and
+	translation'''
+	theta = numpy.radians(twist)
+	c = numpy.cos(theta)
+	s = numpy.sin(theta)
+	pivot = 0.25 * chord
+	return FreeCAD.Matrix(chord, 0, 0, station,
+						0, chord * c, chord * s, leY + pivot * (1 - c),
+						0, -chord * s, chord * c, leZ + pivot * s,
+						0, 0, 0, 1)
+
+def unitWire(key, points, profilePoints, thicknessScale, fitMode, fitTolerance):
+	'''Gets the (cached) unit chord wire for the (2D, unit chord) profile points'''
+	cacheKey = (key, profilePoints, thicknessScale, fitMode, fitTolerance)
+	if cacheKey not in _unitWires:
+		points3d = numpy.column_stack((numpy.zeros(len(points)), points[:, 0], points[:, 1] * thicknessScale))
+		edges, report = profileEdges(points3d, fitMode, fitTolerance)
+		_unitWires[cacheKey] = (Part.Wire(edges), report)
+	return _unitWires[cacheKey]
+
+def buildWing(library, spanTable, sectionsPerPanel=0, profilePoints=80, thicknessScale=1.0,
+			fitMode='bspline', fitTolerance=0.05, solid=True, prof=MacroProfiler.nullProfiler):
+	'''Builds the wing described by spanTable (profiles are looked up in library).
+	Returns a 2-tuple of (shape, list of section wires).  prof is a
+	MacroProfiler.Profiler to time the phases with.'''
+	with prof.phase('load'):
+		names = [row[5] for row in spanTable]
+		airfoils = [library.get(name) for name in names]
+
+	with prof.phase('geometry'):
+		sections = planform(spanTable, sectionsPerPanel)
+
+		# resampled unit profiles of each row, blended for every section at once
+		base = numpy.array([airfoil.resampled(profilePoints) for airfoil in airfoils])
+		lower = sections['lower']
+		upper = numpy.minimum(lower + 1, len(names) - 1)
+		weight = sections['weight'][:, None, None]
+		blended = base[lower] * (1.0 - weight) + base[upper] * weight
+
+	# sections with the same (blended) profile share a fit.  The unit chord tolerance
+	# is rounded down to a power of 2 so small planform edits still hit the cache.
+	unitTolerance = float(2.0 ** numpy.floor(numpy.log2(fitTolerance / sections['chord'].max())))
+	with prof.phase('occ'):
+		wires = []
+		for i in range(len(lower)):
+			w = round(float(sections['weight'][i]), 6)
+			a = airfoils[lower[i]]
+			b = airfoils[upper[i]]
+			key = (a,) if w == 0.0 or a is b else (a, b, w)
+			wire, report = unitWire(key, blended[i], profilePoints, thicknessScale, fitMode, unitTolerance)
+			if report.fallbackCount:
+				FreeCAD.Console.PrintWarning("Section %s: %s\n" % (i, report))
+			matrix = sectionMatrix(sections['station'][i], sections['chord'][i], sections['twist'][i],
+								sections['leY'][i], sections['leZ'][i])
+			# the matrix is a uniform scale and a rotation, so the edges can be moved
+			# as they are (transformGeometry would convert every edge to a B-spline)
+			placed = wire.copy()
+			placed.transformShape(matrix)
+			wires.append(placed)
+		wing = Part.makeLoft(wires, solid, False)
+
+	return wing, wires